@@ -0,0 +1,127 @@
+"""Particle spawn and action switch throughput, before and after shared clips.
+
+"before" replays the old code path, where every particle and every action
+change copied an Animation object, "after" uses the shared clips.
+
+Run from the repository root:
+
+    python -m benchmarks.animation_spawn
+"""
+
+from __future__ import annotations
+
+import itertools
+import os
+import timeit
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame  # noqa: E402
+from pygame import Vector2 as Vec2  # noqa: E402
+
+from src.Animation import Animation  # noqa: E402
+from src.entities.Player import Player  # noqa: E402
+from src.ParticleSystem import ParticleSystem  # noqa: E402
+from src.utils import load_images  # noqa: E402
+
+SPAWNS = 20_000
+SWITCHES = 20_000
+
+
+class _CopiedAnimation:
+    """Animation as it was before clips were shared: copied per user."""
+
+    def __init__(self, images: list, duration: int = 5, loop=True) -> None:
+        self._images = images
+        self._duration = duration
+        self._loop = loop
+        self._done = False
+        self._frame = 0
+
+    def copy(self) -> _CopiedAnimation:
+        return _CopiedAnimation(self._images, self._duration, self._loop)
+
+
+class _ParticleObject:
+    """Particle as it was before the particle pool: one object per particle."""
+
+    def __init__(
+        self, assets: dict, type: str, position: Vec2, velocity: Vec2, frame=0
+    ) -> None:
+        self.type = type
+        self.position = position
+        self._velocity = velocity
+        self._animation = assets["particle/" + type].copy()
+        self._animation._frame = frame
+
+
+def _best(stmt, number: int) -> float:
+    seconds = min(timeit.repeat(stmt, number=number, repeat=5))
+    return number / seconds
+
+
+def main() -> None:
+    pygame.init()
+    pygame.display.set_mode((1, 1))
+
+    particle_images = load_images("particles/particle")
+    before_assets = {
+        "particle/particle": _CopiedAnimation(particle_images, loop=False),
+        "player/idle": _CopiedAnimation(load_images("entities/player/idle"), 6),
+        "player/run": _CopiedAnimation(load_images("entities/player/run"), 4),
+    }
+    after_assets = {
+        "particle/particle": Animation(particle_images, loop=False),
+        "player/idle": Animation(load_images("entities/player/idle"), duration=6),
+        "player/run": Animation(load_images("entities/player/run"), duration=4),
+    }
+
+    position, velocity = Vec2(10, 10), Vec2(0.5, -0.5)
+
+    particles: list[_ParticleObject] = []
+
+    def spawn_before() -> None:
+        if len(particles) == SPAWNS:
+            particles.clear()
+        particles.append(
+            _ParticleObject(
+                before_assets, "particle", position.copy(), velocity.copy(), 2
+            )
+        )
+
+    pool = ParticleSystem(after_assets, capacity=SPAWNS)
+
+    def spawn_after() -> None:
+        if len(pool) == SPAWNS:
+            pool.clear()
+        pool.spawn("particle", position, velocity, 2)
+
+    # Entity._set_action copied the clip on every change of action
+    before_switches = itertools.count()
+
+    def switch_before() -> None:
+        action = "run" if next(before_switches) % 2 else "idle"
+        before_assets["player/" + action].copy()
+
+    player = Player(after_assets, pool, Vec2(0, 0), Vec2(8, 15))
+    after_switches = itertools.count()
+
+    def switch_after() -> None:
+        player._set_action("run" if next(after_switches) % 2 else "idle")
+
+    results = [
+        ("particle spawn", _best(spawn_before, SPAWNS), _best(spawn_after, SPAWNS)),
+        (
+            "action switch",
+            _best(switch_before, SWITCHES),
+            _best(switch_after, SWITCHES),
+        ),
+    ]
+
+    print(f"{'':16}{'before/s':>14}{'after/s':>14}{'speedup':>10}")
+    for name, before, after in results:
+        print(f"{name:16}{before:14,.0f}{after:14,.0f}{after / before:9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
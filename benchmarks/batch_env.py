@@ -0,0 +1,86 @@
+"""Steps per second of BatchEnv against one Simulation per copy.
+
+Both sides play the same random inputs on copies of one map, "objects"
+steps a Simulation per copy as the game does, "batch" steps all copies at
+once. Run from the repository root:
+
+    python -m benchmarks.batch_env --copies 256 --steps 600
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import pygame  # noqa: E402
+
+from src.AssetManager import AssetManager  # noqa: E402
+from src.assets import register_game_assets  # noqa: E402
+from src.BatchEnv import BatchEnv  # noqa: E402
+from src.Input import decode_input  # noqa: E402
+from src.Rng import RngStreams  # noqa: E402
+from src.Simulation import Simulation  # noqa: E402
+
+
+def random_actions(copies: int, steps: int, seed: int) -> list[list[int]]:
+    rng = random.Random(seed)
+    return [[rng.randrange(16) for _ in range(copies)] for _ in range(steps)]
+
+
+def run_objects(
+    assets: AssetManager, num_of_maps: int, map_id: int, actions: list[list[int]]
+) -> float:
+    sims = []
+    for i in range(len(actions[0])):
+        sim = Simulation(assets, num_of_maps, RngStreams(i))
+        sim.level = map_id
+        sim.load_level(map_id)
+        sims.append(sim)
+
+    start = time.perf_counter()
+    for step_actions in actions:
+        for sim, action in zip(sims, step_actions):
+            sim.step(decode_input(action))
+    return time.perf_counter() - start
+
+
+def run_batch(assets: AssetManager, map_id: int, actions: list[list[int]]) -> float:
+    env = BatchEnv.from_map(assets, map_id, len(actions[0]))
+    env.reset()
+
+    start = time.perf_counter()
+    for step_actions in actions:
+        env.step(step_actions)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--copies", type=int, default=256)
+    parser.add_argument("--steps", type=int, default=600)
+    parser.add_argument("--map", type=int, default=0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    pygame.init()
+    pygame.display.set_mode((1, 1))
+    assets = AssetManager()
+    num_of_maps = register_game_assets(assets)
+
+    actions = random_actions(args.copies, args.steps, args.seed)
+    total = args.copies * args.steps
+    objects = total / run_objects(assets, num_of_maps, args.map, actions)
+    batch = total / run_batch(assets, args.map, actions)
+
+    print(f"{args.copies} copies x {args.steps} steps of map {args.map}")
+    print(f"{'objects':10}{objects:14,.0f} steps/s")
+    print(f"{'batch':10}{batch:14,.0f} steps/s{batch / objects:9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""Entity broadphase cost as the enemy count grows from 10 to 2000.
+
+For every count, enemies are spawned on random ground tiles of a map and
+compared per tick:
+
+- player query: the dashing player against every enemy with a new rect per
+  enemy, as before, against a query of the spatial grid
+- grid upkeep: moving every enemy in the grid after it updated
+- pairs: every overlapping pair of enemies by testing all pairs, against
+  SpatialGrid.pairs
+- step: a whole Simulation.step
+
+Run from the repository root:
+
+    python -m benchmarks.entity_broadphase
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import timeit
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import pygame  # noqa: E402
+from pygame import Vector2 as Vec2  # noqa: E402
+
+from src.AssetManager import AssetManager  # noqa: E402
+from src.assets import register_game_assets  # noqa: E402
+from src.Input import patrol_script  # noqa: E402
+from src.Rng import RngStreams  # noqa: E402
+from src.Simulation import Simulation  # noqa: E402
+from src.Tilemap import PHYSICS_TILES  # noqa: E402
+
+COUNTS = (10, 50, 100, 500, 1000, 2000)
+
+
+def ground_positions(tiles: list[dict], tile_size: int) -> list[Vec2]:
+    """Top left of an enemy standing on every solid tile with air above."""
+    solid = {tuple(tile["pos"]) for tile in tiles if tile["type"] in PHYSICS_TILES}
+    return [
+        Vec2(x * tile_size, (y - 1) * tile_size)
+        for x, y in sorted(solid)
+        if (x, y - 1) not in solid
+    ]
+
+
+def populate(
+    sim: Simulation, map_id: int, count: int, positions: list[Vec2], seed: int
+) -> None:
+    """Restart the level with `count` enemies on random ground tiles."""
+    rng = random.Random(seed)
+    sim.load_level(map_id)
+    for enemy in sim.enemies.copy():
+        sim.enemies.remove(enemy)
+        sim.enemy_index.remove(enemy)
+    for _ in range(count):
+        sim.spawn_enemy(rng.choice(positions) + Vec2(rng.randrange(8), 0))
+
+
+def _per_tick_us(stmt, number: int) -> float:
+    return min(timeit.repeat(stmt, number=number, repeat=3)) / number * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--map", type=int, default=0)
+    parser.add_argument("--ticks", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    pygame.init()
+    pygame.display.set_mode((1, 1))
+    assets = AssetManager()
+    num_of_maps = register_game_assets(assets)
+    tile_size, tiles, _ = assets[f"map/{args.map}"]
+    positions = ground_positions(tiles, tile_size)
+
+    sim = Simulation(assets, num_of_maps, RngStreams(args.seed))
+    sim.level = args.map
+    sim.load_level(args.map)
+
+    print(
+        f"{'enemies':>8}{'query before':>14}{'query grid':>12}{'grid upkeep':>13}"
+        f"{'pairs before':>14}{'pairs grid':>12}{'step':>12}   (us per tick)"
+    )
+    for count in COUNTS:
+        populate(sim, args.map, count, positions, args.seed)
+        player = sim.player
+        enemies = sim.enemies
+
+        def query_before() -> list:
+            player_rect = pygame.Rect(player._position, player._size)
+            return [
+                enemy
+                for enemy in enemies
+                if player_rect.colliderect(pygame.Rect(enemy._position, enemy._size))
+            ]
+
+        def query_grid() -> set:
+            return sim.enemy_index.query_rect(player.rect)
+
+        def upkeep() -> None:
+            for enemy in enemies:
+                sim.enemy_index.move(enemy, enemy.rect)
+
+        def pairs_before() -> list:
+            rects = [enemy.rect for enemy in enemies]
+            return [
+                (i, j)
+                for i in range(len(rects))
+                for j in range(i + 1, len(rects))
+                if rects[i].colliderect(rects[j])
+            ]
+
+        def pairs_grid() -> list:
+            return list(sim.enemy_index.pairs())
+
+        def step() -> None:
+            sim.step(patrol_script(sim.tick))
+
+        # the full pair test is quadratic, keep its runs short
+        pair_ticks = max(1, args.ticks * 100 // count)
+        print(
+            f"{count:8}"
+            f"{_per_tick_us(query_before, args.ticks):14.0f}"
+            f"{_per_tick_us(query_grid, args.ticks):12.0f}"
+            f"{_per_tick_us(upkeep, args.ticks):13.0f}"
+            f"{_per_tick_us(pairs_before, pair_ticks):14.0f}"
+            f"{_per_tick_us(pairs_grid, args.ticks):12.0f}"
+            f"{_per_tick_us(step, args.ticks):12.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
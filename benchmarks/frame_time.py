@@ -0,0 +1,85 @@
+"""Headless frame-time benchmark over the shipped maps.
+
+Runs the game without a window and without frame rate throttling, driven
+by a fixed input script, and prints per-phase timings for every map as
+JSON. Run from the repository root:
+
+    python -m benchmarks.frame_time --frames 600 --output bench.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import time
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+from main import Game  # noqa: E402
+from src.Input import patrol_script  # noqa: E402
+from src.Outline import OUTLINE_MODES  # noqa: E402
+
+
+def benchmark_map(game: Game, map_id: int, frames: int, warmup: int) -> dict:
+    game.sim.level = map_id
+    game.sim.load_level(map_id)
+    game.sim.tick = 0
+
+    game.run_headless(warmup)
+    game.profiler.reset()
+
+    start = time.perf_counter()
+    game.run_headless(frames)
+    elapsed = time.perf_counter() - start
+
+    return {
+        "map": map_id,
+        "frames": frames,
+        "total_ms": elapsed * 1000,
+        "mean_frame_ms": elapsed * 1000 / frames,
+        "fps": frames / elapsed,
+        "phases": game.profiler.report(),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--frames", type=int, default=600)
+    parser.add_argument("--warmup", type=int, default=60)
+    parser.add_argument("--maps", type=int, nargs="*")
+    parser.add_argument("--outline", choices=OUTLINE_MODES, default="cached")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the JSON report to this file")
+    args = parser.parse_args()
+
+    game = Game(
+        outline_mode=args.outline,
+        headless=True,
+        input_script=patrol_script,
+        profile=True,
+        seed=args.seed,
+    )
+    maps = args.maps if args.maps else range(game.num_of_maps)
+
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "outline": args.outline,
+        "seed": args.seed,
+        "results": [
+            benchmark_map(game, map_id, args.frames, args.warmup) for map_id in maps
+        ],
+    }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""Pack every image in assets/images into one atlas for fast startup.
+
+Writes build/atlas/atlas.png and its manifest, plus with --raw the raw
+pixels of the atlas, which load without PNG decoding:
+
+    python build_atlas.py --raw
+
+The game checks the manifest against the source images and falls back to
+loading the PNGs while the atlas is missing or out of date.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame  # noqa: E402
+
+from src.Atlas import (  # noqa: E402
+    ATLAS_DIR,
+    ATLAS_IMAGE,
+    ATLAS_MANIFEST,
+    ATLAS_RAW,
+    ATLAS_VERSION,
+    source_fingerprint,
+)
+from src.utils import IMAGES_DIR  # noqa: E402
+
+ATLAS_WIDTH = 512
+
+
+def pack(sizes: dict[str, tuple[int, int]], width: int) -> tuple[dict, int]:
+    """Place rectangles on shelves, tallest first
+
+    Args:
+        sizes (dict[str, tuple[int, int]]): size of every image by path
+        width (int): width of the atlas
+
+    Returns:
+        tuple[dict, int]: (x, y) of every image by path and the atlas height
+    """
+    positions = {}
+    x = y = shelf_height = 0
+
+    for path in sorted(sizes, key=lambda path: (-sizes[path][1], path)):
+        w, h = sizes[path]
+        if w > width:
+            raise ValueError(f"{path} is wider than the atlas")
+        if x + w > width:
+            x, y = 0, y + shelf_height
+            shelf_height = 0
+
+        positions[path] = (x, y)
+        x += w
+        shelf_height = max(shelf_height, h)
+
+    return positions, y + shelf_height
+
+
+def build(raw: bool) -> None:
+    pygame.init()
+    pygame.display.set_mode((1, 1))
+
+    images = {}
+    for root, _, files in os.walk(IMAGES_DIR):
+        for name in files:
+            if name.endswith(".png"):
+                path = os.path.relpath(os.path.join(root, name), IMAGES_DIR)
+                # converted like the game does, dropping any alpha channel
+                images[path.replace(os.sep, "/")] = pygame.image.load(
+                    os.path.join(root, name)
+                ).convert()
+
+    positions, height = pack(
+        {path: img.get_size() for path, img in images.items()}, ATLAS_WIDTH
+    )
+    atlas = pygame.Surface((ATLAS_WIDTH, height))
+    atlas.blits([(images[path], pos) for path, pos in positions.items()])
+
+    os.makedirs(ATLAS_DIR, exist_ok=True)
+    pygame.image.save(atlas, ATLAS_IMAGE)
+    if raw:
+        with open(ATLAS_RAW, "wb") as f:
+            f.write(pygame.image.tobytes(atlas, "RGB"))
+    elif os.path.exists(ATLAS_RAW):
+        os.remove(ATLAS_RAW)
+
+    with open(ATLAS_MANIFEST, "w") as f:
+        json.dump(
+            {
+                "version": ATLAS_VERSION,
+                "fingerprint": source_fingerprint(IMAGES_DIR),
+                "size": atlas.get_size(),
+                "images": {
+                    path: [*positions[path], *images[path].get_size()]
+                    for path in sorted(positions)
+                },
+            },
+            f,
+            indent=1,
+        )
+
+    print(f"packed {len(images)} images into {ATLAS_WIDTH}x{height}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--raw", action="store_true", help="also write raw pixels, skipping PNG decode"
+    )
+    build(parser.parse_args().raw)
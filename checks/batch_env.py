@@ -0,0 +1,168 @@
+"""Check BatchEnv against Simulation, tick by tick, on every map.
+
+Every copy of a BatchEnv and a Simulation with the same seed play the same
+random inputs; the player, enemies and projectiles must stay equal until
+the copy is done, and its done code must match what happened in the game.
+Exits with status 1 on the first mismatch. Run from the repository root:
+
+    python -m checks.batch_env --copies 32 --ticks 1200
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import sys
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import pygame  # noqa: E402
+
+from src.AssetManager import AssetManager  # noqa: E402
+from src.assets import register_game_assets  # noqa: E402
+from src.BatchEnv import CLEARED, DEAD, RUNNING, BatchEnv  # noqa: E402
+from src.Input import (  # noqa: E402
+    INPUT_DASH,
+    INPUT_JUMP,
+    INPUT_LEFT,
+    INPUT_RIGHT,
+    decode_input,
+)
+from src.Rng import RngStreams  # noqa: E402
+from src.Simulation import Simulation  # noqa: E402
+
+DONE_NAMES = {RUNNING: "running", DEAD: "dead", CLEARED: "cleared"}
+
+
+def random_action(rng: random.Random, right: bool) -> int:
+    """Held direction, jumping and dashing now and then."""
+    action = INPUT_RIGHT if right else INPUT_LEFT
+    if rng.random() < 1 / 20:
+        action |= INPUT_JUMP
+    if rng.random() < 1 / 60:
+        action |= INPUT_DASH
+    return action
+
+
+def sim_state(sim: Simulation) -> tuple:
+    player = sim.player
+    return (
+        (*player._position, *player._velocity),
+        [
+            (*enemy._position, enemy._velocity.y, enemy._flip, enemy._walking)
+            for enemy in sim.enemies
+        ],
+        sim.projectiles.state()[:3],
+    )
+
+
+def env_state(env: BatchEnv, i: int) -> tuple:
+    obs = env.observation
+    base = i * env.enemies
+    live = range(
+        i * env.projectile_capacity, i * env.projectile_capacity + obs.projectiles[i]
+    )
+    return (
+        (obs.x[i], obs.y[i], obs.velocity_x[i], obs.velocity_y[i]),
+        [
+            (
+                env._enemy_x[k],
+                env._enemy_y[k],
+                env._enemy_velocity_y[k],
+                env._enemy_flip[k],
+                env._enemy_walking[k],
+            )
+            for k in range(base, base + env.enemies)
+            if env._alive[k]
+        ],
+        (
+            [obs.projectile_x[p] for p in live],
+            [obs.projectile_y[p] for p in live],
+            [obs.projectile_direction[p] for p in live],
+        ),
+    )
+
+
+def sim_done(sim: Simulation) -> int:
+    if not sim.enemies:
+        return CLEARED
+    if sim.player.is_dead or sim.dead:
+        return DEAD
+    return RUNNING
+
+
+def check_map(
+    assets: AssetManager, num_of_maps: int, map_id: int, copies: int, ticks: int
+) -> dict[int, int]:
+    """Outcome counts of the copies of one map, exits on a mismatch."""
+    env = BatchEnv.from_map(assets, map_id, copies, max_steps=ticks + 1)
+    env.reset()
+    sims = []
+    for i in range(copies):
+        sim = Simulation(assets, num_of_maps, RngStreams(i))
+        sim.level = map_id
+        sim.load_level(map_id)
+        sims.append(sim)
+
+    agents = [random.Random(f"{i}/check") for i in range(copies)]
+    directions = [True] * copies
+    playing = set(range(copies))
+    outcomes = {RUNNING: 0, DEAD: 0, CLEARED: 0}
+
+    for tick in range(1, ticks + 1):
+        actions = []
+        for i in range(copies):
+            if agents[i].random() < 1 / 120:
+                directions[i] = not directions[i]
+            actions.append(random_action(agents[i], directions[i]))
+
+        for i in playing:
+            sims[i].step(decode_input(actions[i]))
+        # copies are reset once done, compare before stepping the batch on
+        expected = {i: sim_state(sims[i]) for i in playing}
+        _, dones = env.step(actions)
+
+        for i in sorted(playing):
+            done = sim_done(sims[i])
+            if dones[i] != done:
+                sys.exit(
+                    f"map {map_id} copy {i} tick {tick}: batch "
+                    f"{DONE_NAMES[dones[i]]}, game {DONE_NAMES[done]}"
+                )
+            if done == RUNNING and env_state(env, i) != expected[i]:
+                sys.exit(
+                    f"map {map_id} copy {i} tick {tick}: state differs\n"
+                    f"  game  {expected[i]}\n  batch {env_state(env, i)}"
+                )
+            if done != RUNNING:
+                outcomes[done] += 1
+                playing.discard(i)
+
+    outcomes[RUNNING] = len(playing)
+    return outcomes
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--copies", type=int, default=32)
+    parser.add_argument("--ticks", type=int, default=1200)
+    parser.add_argument("--maps", type=int, nargs="*", help="map ids (default: all)")
+    args = parser.parse_args()
+
+    pygame.init()
+    pygame.display.set_mode((1, 1))
+    assets = AssetManager()
+    num_of_maps = register_game_assets(assets)
+
+    for map_id in args.maps if args.maps else range(num_of_maps):
+        outcomes = check_map(assets, num_of_maps, map_id, args.copies, args.ticks)
+        print(
+            f"map {map_id}: {args.copies} copies match, {outcomes[DEAD]} dead, "
+            f"{outcomes[CLEARED]} cleared, {outcomes[RUNNING]} still playing"
+        )
+
+
+if __name__ == "__main__":
+    main()
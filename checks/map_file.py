@@ -0,0 +1,67 @@
+"""Check that maps survive a JSON -> .map -> JSON round trip unchanged.
+
+Every map in assets/maps, and small maps with integer, fractional and mixed
+off-grid positions, are converted to the binary format and back; the JSON
+must be equal, ints staying ints. Exits with status 1 on the first
+difference. Run from the repository root:
+
+    python -m checks.map_file
+"""
+
+from __future__ import annotations
+
+import glob
+import json
+import os
+import sys
+import tempfile
+
+from src.MapFile import BINARY_MAP_EXTENSION, JSON_MAP_EXTENSION, read_map, write_map
+
+SAMPLE_OFFGRID = {
+    "int": [(3, -7), (120, 48)],
+    "fractional": [(3.5, -7.25), (120.0, 48.0)],
+    "mixed": [(3, -7.5), (120.0, 48)],
+}
+
+
+def sample_maps(directory: str) -> list[str]:
+    paths = []
+    for name, positions in SAMPLE_OFFGRID.items():
+        path = os.path.join(directory, name + JSON_MAP_EXTENSION)
+        write_map(
+            path,
+            16,
+            [{"type": "grass", "variant": 1, "pos": [-2, 5]}],
+            [
+                {"type": "decor", "variant": i, "pos": list(pos)}
+                for i, pos in enumerate(positions)
+            ],
+        )
+        paths.append(path)
+    return paths
+
+
+def canonical(path: str) -> str:
+    """The map as JSON text with sorted keys, 1 and 1.0 staying apart."""
+    with open(path, "r") as f:
+        return json.dumps(json.load(f), sort_keys=True)
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        sources = sorted(glob.glob(f"assets/maps/*{JSON_MAP_EXTENSION}"))
+        for source in sources + sample_maps(directory):
+            name = os.path.splitext(os.path.basename(source))[0]
+            binary = os.path.join(directory, name + BINARY_MAP_EXTENSION)
+            back = os.path.join(directory, name + ".back" + JSON_MAP_EXTENSION)
+            write_map(binary, *read_map(source))
+            write_map(back, *read_map(binary))
+
+            if canonical(back) != canonical(source):
+                sys.exit(f"{source}: differs after a round trip through {binary}")
+            print(f"{source}: round trip matches")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+"""Check Tilemap.move_box against reference collision resolutions.
+
+On every map, boxes placed at random free spots near solid tiles move by
+random amounts and must end where a reference resolution puts them, with
+the same collision sides:
+
+- game speeds: entity sized boxes at up to the dash speed, against the rect
+  resolution move_box replaced, which tested the 3x3 tiles around the box
+- fast moves: boxes up to 40px at up to 100px per move, against the rect
+  resolution of every overlapped tile sub-stepped one pixel at a time, so
+  any tunnelling shows up as a mismatch
+
+The batched physics rect query is checked along, against the solid cells
+overlapping random areas, before and after tiles are edited.
+
+Exits with status 1 on the first mismatch. Run from the repository root:
+
+    python -m checks.move_box --moves 20000
+"""
+
+from __future__ import annotations
+
+import argparse
+import math
+import os
+import random
+import sys
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import pygame  # noqa: E402
+
+from src.AssetManager import AssetManager  # noqa: E402
+from src.assets import register_game_assets  # noqa: E402
+from src.Tilemap import (  # noqa: E402
+    COLLISION_DOWN,
+    COLLISION_LEFT,
+    COLLISION_RIGHT,
+    COLLISION_UP,
+    Tilemap,
+)
+
+ENTITY_SIZE = (8, 15)
+# the dash with a held direction, and the terminal velocity
+GAME_SPEED = (9, 5)
+FAST_SPEED = 100
+FAST_SIZES = (1, 40)
+
+
+def solid_rects(tilemap: Tilemap, rect: pygame.Rect, cells: list) -> list:
+    size = tilemap._tile_size
+    return [
+        pygame.Rect(
+            (rect.x // size + x) * size, (rect.y // size + y) * size, size, size
+        )
+        for x, y in cells
+        if tilemap.is_solid(rect.x // size + x, rect.y // size + y)
+    ]
+
+
+def solid_cells(tilemap: Tilemap) -> set[tuple[int, int]]:
+    origin_x, origin_y = tilemap._solid_origin
+    return {
+        (origin_x + x, origin_y + y)
+        for x in range(tilemap._solid_width)
+        for y in range(tilemap._solid_height)
+        if tilemap.is_solid(origin_x + x, origin_y + y)
+    }
+
+
+def old_resolution(tilemap: Tilemap, x, y, width, height, dx, dy) -> tuple:
+    """Entity.update before move_box, against the 3x3 tiles around the box."""
+    around = [(cx, cy) for cx in (-1, 0, 1) for cy in (-1, 0, 1)]
+    collisions = 0
+
+    x += dx
+    rect = pygame.Rect(x, y, width, height)
+    for tile_rect in solid_rects(tilemap, rect, around):
+        if rect.colliderect(tile_rect):
+            if dx > 0:
+                rect.right = tile_rect.left
+                collisions |= COLLISION_RIGHT
+            elif dx < 0:
+                rect.left = tile_rect.right
+                collisions |= COLLISION_LEFT
+            x = rect.x
+
+    y += dy
+    rect = pygame.Rect(x, y, width, height)
+    for tile_rect in solid_rects(tilemap, rect, around):
+        if rect.colliderect(tile_rect):
+            if dy > 0:
+                rect.bottom = tile_rect.top
+                collisions |= COLLISION_DOWN
+            elif dy < 0:
+                rect.top = tile_rect.bottom
+                collisions |= COLLISION_UP
+            y = rect.y
+
+    return x, y, collisions
+
+
+def substepped_resolution(tilemap: Tilemap, x, y, width, height, dx, dy) -> tuple:
+    """Moves of at most one pixel, resolved against every overlapped tile."""
+    size = tilemap._tile_size
+    collisions = 0
+
+    for axis, delta in ((0, dx), (1, dy)):
+        start = x if axis == 0 else y
+        steps = max(1, math.ceil(abs(delta)))
+        for step in range(1, steps + 1):
+            # the last step lands on start + delta exactly, like one move
+            position = start + (delta if step == steps else delta * step / steps)
+            if axis == 0:
+                x = position
+            else:
+                y = position
+            rect = pygame.Rect(x, y, width, height)
+            cells = [
+                (cx, cy)
+                for cx in range(0, (rect.right - 1) // size - rect.x // size + 1)
+                for cy in range(0, (rect.bottom - 1) // size - rect.y // size + 1)
+            ]
+            hits = [t for t in solid_rects(tilemap, rect, cells) if rect.colliderect(t)]
+            if not hits:
+                continue
+            if axis == 0 and delta > 0:
+                x = min(t.left for t in hits) - width
+                collisions |= COLLISION_RIGHT
+            elif axis == 0:
+                x = max(t.right for t in hits)
+                collisions |= COLLISION_LEFT
+            elif delta > 0:
+                y = min(t.top for t in hits) - height
+                collisions |= COLLISION_DOWN
+            else:
+                y = max(t.bottom for t in hits)
+                collisions |= COLLISION_UP
+            break
+
+    return x, y, collisions
+
+
+def free_box(tilemap: Tilemap, rng: random.Random, width: int, height: int) -> tuple:
+    """Random position of a box not overlapping any solid tile, near some."""
+    size = tilemap._tile_size
+    origin_x, origin_y = tilemap._solid_origin
+    while True:
+        x = (origin_x - 2 + rng.random() * (tilemap._solid_width + 4)) * size
+        y = (origin_y - 2 + rng.random() * (tilemap._solid_height + 4)) * size
+        rect = pygame.Rect(x, y, width, height)
+        if not any(
+            tilemap.is_solid(cx, cy)
+            for cx in range(rect.x // size, (rect.right - 1) // size + 1)
+            for cy in range(rect.y // size, (rect.bottom - 1) // size + 1)
+        ):
+            return x, y
+
+
+def check(tilemap: Tilemap, name: str, reference, move) -> None:
+    expected = reference(tilemap, *move)
+    actual = tilemap.move_box(*move)
+    if expected != actual:
+        sys.exit(f"{name}: move_box{move} = {actual}, expected {expected}")
+
+
+def check_physics_rects(tilemap: Tilemap, rng: random.Random, queries: int) -> None:
+    size = tilemap._tile_size
+    origin_x, origin_y = tilemap._solid_origin
+    areas = []
+    for _ in range(queries):
+        x = (origin_x - 2 + rng.random() * (tilemap._solid_width + 4)) * size
+        y = (origin_y - 2 + rng.random() * (tilemap._solid_height + 4)) * size
+        areas.append(pygame.Rect(x, y, rng.randint(1, 64), rng.randint(1, 64)))
+
+    batch = tilemap.get_physics_rects_batch(areas)
+    for area, rects in zip(areas, batch):
+        cells = [
+            (cx, cy)
+            for cx in range(0, (area.right - 1) // size - area.x // size + 1)
+            for cy in range(0, (area.bottom - 1) // size - area.y // size + 1)
+        ]
+        if rects != solid_rects(tilemap, area, cells):
+            sys.exit(f"physics rects: {area} gave {rects}")
+
+    # the rects of a cell are shared between queries, not allocated again
+    again = tilemap.get_physics_rects_batch(areas)
+    if any(
+        a is not b for rects, others in zip(batch, again) for a, b in zip(rects, others)
+    ):
+        sys.exit("physics rects: a query allocated new rects")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--moves", type=int, default=20000, help="per map and kind")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    pygame.init()
+    pygame.display.set_mode((1, 1))
+    assets = AssetManager()
+    num_of_maps = register_game_assets(assets)
+    rng = random.Random(args.seed)
+
+    for map_id in range(num_of_maps):
+        tilemap = Tilemap(assets, tile_size=16)
+        tilemap.load_data(*assets[f"map/{map_id}"])
+
+        for _ in range(args.moves):
+            x, y = free_box(tilemap, rng, *ENTITY_SIZE)
+            dx = rng.uniform(-GAME_SPEED[0], GAME_SPEED[0])
+            dy = rng.uniform(-GAME_SPEED[1], GAME_SPEED[1])
+            check(tilemap, "game speed", old_resolution, (x, y, *ENTITY_SIZE, dx, dy))
+
+        for _ in range(args.moves):
+            width, height = rng.randint(*FAST_SIZES), rng.randint(*FAST_SIZES)
+            x, y = free_box(tilemap, rng, width, height)
+            dx = rng.uniform(-FAST_SPEED, FAST_SPEED)
+            dy = rng.uniform(-FAST_SPEED, FAST_SPEED)
+            check(tilemap, "fast", substepped_resolution, (x, y, width, height, dx, dy))
+
+        check_physics_rects(tilemap, rng, args.moves)
+        # removed solid tiles, and one outside the solid bounds which
+        # rebuilds the bitmap, must not leave stale rects behind
+        for x, y in rng.sample(sorted(solid_cells(tilemap)), 10):
+            tilemap.remove_tile((x, y))
+        tilemap.set_tile(
+            (tilemap._solid_origin[0] - 3, tilemap._solid_origin[1] - 3), "stone", 0
+        )
+        check_physics_rects(tilemap, rng, args.moves)
+
+        print(f"map {map_id}: {2 * args.moves} moves and physics rects match")
+
+
+if __name__ == "__main__":
+    main()
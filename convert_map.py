@@ -0,0 +1,43 @@
+"""Convert maps between the JSON and the binary .map format.
+
+The format of each file is given by its extension, e.g.
+
+    python convert_map.py assets/maps/0.json assets/maps/0.map
+    python convert_map.py --all           # every assets/maps/*.json to .map
+"""
+
+from __future__ import annotations
+
+import argparse
+import glob
+import os
+
+from src.MapFile import BINARY_MAP_EXTENSION, JSON_MAP_EXTENSION, read_map, write_map
+
+
+def convert(source: str, destination: str) -> None:
+    write_map(destination, *read_map(source))
+    print(
+        f"{source} ({os.path.getsize(source)} B) -> "
+        f"{destination} ({os.path.getsize(destination)} B)"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("source", nargs="?")
+    parser.add_argument("destination", nargs="?")
+    parser.add_argument(
+        "--all",
+        action="store_true",
+        help=f"convert every assets/maps/*{JSON_MAP_EXTENSION} to {BINARY_MAP_EXTENSION}",
+    )
+    args = parser.parse_args()
+
+    if args.all:
+        for source in sorted(glob.glob(f"assets/maps/*{JSON_MAP_EXTENSION}")):
+            convert(source, os.path.splitext(source)[0] + BINARY_MAP_EXTENSION)
+    elif args.source and args.destination:
+        convert(args.source, args.destination)
+    else:
+        parser.error("give a source and a destination, or --all")
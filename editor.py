@@ -1,42 +1,55 @@
 from __future__ import annotations
 
+import argparse
+import functools
 import sys
 
 import pygame
 from pygame import Vector2 as Vec2
 
+from src.AssetManager import AssetManager
+from src.Effects import EffectCache
+from src.Presenter import PRESENT_MODES, Presenter
 from src.Tilemap import Tilemap
 from src.utils import load_images
 
 
 class Editor:
-    def __init__(self) -> None:
+    def __init__(self, map_path: str = "map.json", present_mode: str = "dirty") -> None:
         pygame.init()
         self.screen = pygame.display.set_mode((960, 720))
         self.display = pygame.Surface((320, 240))
         self.display_center = Vec2(self.display.get_size()) / 2
         self.render_scale = self.display.get_width() / self.screen.get_width()
+        self.presenter = Presenter(self.screen, self.display.get_size(), present_mode)
+        # anything but the tile under the cursor may have changed since the
+        # last frame, present the whole screen
+        self._redraw = True
+        self._previous_offset = Vec2(0, 0)
+        self._previous_cursor_rect = pygame.Rect(0, 0, 0, 0)
+        # map areas edited after the last frame was drawn, in world pixels
+        self._edited_rects: list[pygame.Rect] = []
 
-        self.assets = {
-            # tiles graphics with variants
-            "grass": load_images("tiles/grass"),
-            "stone": load_images("tiles/stone"),
-            "decor": load_images("tiles/decor"),
-            "large_decor": load_images("tiles/large_decor"),
-            "spawners": load_images("tiles/spawners"),
-        }
+        self.tiles = ["grass", "stone", "decor", "large_decor", "spawners"]
+        # tiles graphics with variants, loaded on first use
+        self.assets = AssetManager()
+        for tile_type in self.tiles:
+            self.assets.register(
+                tile_type, functools.partial(load_images, "tiles/" + tile_type)
+            )
 
         self.tilemap = Tilemap(self.assets, tile_size=16)
+        self.effects = EffectCache()
 
+        self.map_path = map_path
         try:
-            self.tilemap.load("map.json")
+            self.tilemap.load(self.map_path)
         except FileNotFoundError:
             pass
 
         self.movement = [False, False, False, False]
         self.camera_offset = Vec2(0, 0)
 
-        self.tiles = ["grass", "stone", "decor", "large_decor", "spawners"]
         self.current_type = 0
         self.current_variant = 0
         self.on_grid = True
@@ -53,45 +66,47 @@ class Editor:
             render_offset = self._update_camera()
             self.tilemap.render(self.display, render_offset)
 
-            tile_img = self.assets[self.tiles[self.current_type]][
-                self.current_variant
-            ].copy()
-            tile_img.set_alpha(150)
+            tile_img = self.effects.faded(
+                self.assets[self.tiles[self.current_type]][self.current_variant], 150
+            )
             self.display.blit(tile_img, (10, 10))
 
             mouse_pos = Vec2(pygame.mouse.get_pos()) * self.render_scale
             grid_pos = (mouse_pos + render_offset) // self.tilemap._tile_size
 
             if self.on_grid:
-                self.display.blit(
-                    tile_img, grid_pos * self.tilemap._tile_size - render_offset
-                )
+                cursor_pos = grid_pos * self.tilemap._tile_size - render_offset
             else:
-                self.display.blit(tile_img, mouse_pos)
+                cursor_pos = mouse_pos
+            cursor_rect = self.display.blit(tile_img, cursor_pos)
 
             # adding tiles
             if self.clicking and self.on_grid:
                 pos = int(grid_pos.x), int(grid_pos.y)
-                self.tilemap._tiles[pos] = {
-                    "type": self.tiles[self.current_type],
-                    "variant": self.current_variant,
-                    "pos": pos,
-                }
+                self.tilemap.set_tile(
+                    pos, self.tiles[self.current_type], self.current_variant
+                )
 
             if self.right_clicking and self.on_grid:
                 pos = int(grid_pos.x), int(grid_pos.y)
-                if pos in self.tilemap._tiles:
-                    del self.tilemap._tiles[pos]
+                self.tilemap.remove_tile(pos)
             elif self.right_clicking:
-                pos = mouse_pos + render_offset
-                for tile in self.tilemap._offgrid_tiles.copy():
-                    tile_img = self.assets[tile["type"]][tile["variant"]]
-                    rect = pygame.Rect(tile["pos"], tile_img.get_size())
-                    if rect.collidepoint(pos):
-                        self.tilemap._offgrid_tiles.remove(tile)
+                self.tilemap.remove_offgrid_tiles_at(mouse_pos + render_offset)
+
+            if self._redraw or render_offset != self._previous_offset:
+                dirty = None
+            else:
+                dirty = [self._previous_cursor_rect, cursor_rect]
+                dirty += [rect.move(-render_offset) for rect in self._edited_rects]
+            self._redraw = False
+            self._previous_offset = render_offset
+            self._previous_cursor_rect = cursor_rect
+            # edits show from the next frame, which rebakes their chunks
+            view = self.display.get_rect(topleft=render_offset)
+            self._edited_rects = self.tilemap.dirty_rects(view)
 
             self._handle_events(render_offset)
-            self._update_screen()
+            self._update_screen(dirty)
 
             clock.tick(60)
 
@@ -106,6 +121,9 @@ class Editor:
 
     def _handle_events(self, offset: Vec2) -> None:
         for event in pygame.event.get():
+            if event.type in (pygame.KEYDOWN, pygame.MOUSEBUTTONDOWN):
+                self._redraw = True
+
             if event.type == pygame.QUIT:
                 pygame.quit()
                 sys.exit()
@@ -135,7 +153,7 @@ class Editor:
                 elif event.key == pygame.K_g:
                     self.on_grid = not self.on_grid
                 elif event.key == pygame.K_o:
-                    self.tilemap.save("map.json")
+                    self.tilemap.save(self.map_path)
                 elif event.key == pygame.K_t:
                     self.tilemap.autotile()
             elif event.type == pygame.KEYUP:
@@ -153,12 +171,10 @@ class Editor:
                     if not self.on_grid:
                         mouse_pos = Vec2(pygame.mouse.get_pos()) * self.render_scale
                         pos = mouse_pos + offset
-                        self.tilemap._offgrid_tiles.append(
-                            {
-                                "type": self.tiles[self.current_type],
-                                "variant": self.current_variant,
-                                "pos": tuple(pos),
-                            }
+                        self.tilemap.add_offgrid_tile(
+                            self.tiles[self.current_type],
+                            self.current_variant,
+                            tuple(pos),
                         )
                 elif event.button == 3:
                     self.right_clicking = True
@@ -168,13 +184,21 @@ class Editor:
                 elif event.button == 3:
                     self.right_clicking = False
 
-    def _update_screen(self) -> None:
-        self.screen.blit(
-            pygame.transform.scale(self.display, self.screen.get_size()), (0, 0)
-        )
-        pygame.display.update()
+    def _update_screen(self, dirty: list[pygame.Rect] | None) -> None:
+        self.presenter.present(self.display, dirty=dirty)
+        self.presenter.update()
 
 
 if __name__ == "__main__":
-    game = Editor()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("map", nargs="?", default="map.json", help="map to edit")
+    parser.add_argument(
+        "--present",
+        choices=PRESENT_MODES,
+        default="dirty",
+        help="rescale only what changed or the whole screen every frame",
+    )
+    args = parser.parse_args()
+
+    game = Editor(args.map, args.present)
     game.run()
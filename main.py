@@ -1,315 +1,360 @@
 from __future__ import annotations
 
-import math
+import argparse
 import os
 import random
 import sys
+import time
 
 import pygame
 from pygame import Vector2 as Vec2
 
-from src.Animation import Animation
+from src.AssetManager import AssetManager
+from src.assets import register_game_assets
 from src.Clouds import Clouds
-from src.entities.Enemy import Enemy
-from src.entities.Player import Player
-from src.Particle import Particle
-from src.Spark import Spark
-from src.Tilemap import Tilemap
-from src.utils import load_image, load_images
+from src.Effects import EffectCache
+from src.Input import InputFrame, InputScript
+from src.Outline import OUTLINE_MODES, OutlineRenderer
+from src.Presenter import Presenter
+from src.Profiler import Profiler
+from src.Replay import CHECKPOINT_INTERVAL, Replay, state_hash
+from src.Rng import RngStreams
+from src.Simulation import Simulation
+
+TICK_RATE = 60
+TICK = 1 / TICK_RATE
+MAX_TICKS_PER_FRAME = 5
 
 
 class Game:
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        outline_mode: str = "cached",
+        render_fps: int = 60,
+        max_ticks_per_frame: int = MAX_TICKS_PER_FRAME,
+        headless: bool = False,
+        input_script: InputScript | None = None,
+        profile: bool = False,
+        trace_path: str | None = None,
+        seed: int | None = None,
+        record_path: str | None = None,
+    ) -> None:
+        self.headless = headless
+        if headless:
+            os.environ["SDL_VIDEODRIVER"] = "dummy"
+
         pygame.init()
         self.screen = pygame.display.set_mode((960, 720))
         self.display = pygame.Surface((320, 240), pygame.SRCALPHA)
         self.display_2 = pygame.Surface(self.display.get_size())
         self.display_center = Vec2(self.display.get_size()) / 2
+        self.presenter = Presenter(
+            self.screen, self.display.get_size(), headless=headless
+        )
 
-        self.assets = {
-            "background": load_image("background.png"),
-            "clouds": load_images("clouds"),
-            # tiles graphics with variants
-            "grass": load_images("tiles/grass"),
-            "stone": load_images("tiles/stone"),
-            "decor": load_images("tiles/decor"),
-            "large_decor": load_images("tiles/large_decor"),
-            "spawners": load_images("tiles/spawners"),
-            # player graphics with animations
-            "player": load_image("entities/player.png"),
-            "player/idle": Animation(load_images("entities/player/idle"), duration=6),
-            "player/run": Animation(load_images("entities/player/run"), duration=4),
-            "player/jump": Animation(load_images("entities/player/jump")),
-            "player/wall_slide": Animation(load_images("entities/player/wall_slide")),
-            # enemies graphics
-            "enemy/idle": Animation(load_images("entities/enemy/idle"), duration=6),
-            "enemy/run": Animation(load_images("entities/enemy/run"), duration=4),
-            "gun": load_image("gun.png"),
-            "projectile": load_image("projectile.png"),
-            # particles animations
-            "particle/leaf": Animation(
-                load_images("particles/leaf"), duration=20, loop=False
-            ),
-            "particle/particle": Animation(
-                load_images("particles/particle"), loop=False
-            ),
-        }
-
-        self.num_of_maps = len(os.listdir("assets/maps"))
-        self.tilemap = Tilemap(self.assets, tile_size=16)
-        self.clouds = Clouds(self.assets["clouds"])
-        self.particles: list[Particle] = []
-        self.projectiles: list[list] = []  # projectile = [Vec2, direction, timer]
-        self.sparks: list[Spark] = []
-        self.enemies: list[Enemy] = []
-        self.leaf_spawners: list[pygame.Rect] = []
+        self.assets = AssetManager()
+        self.num_of_maps = register_game_assets(self.assets)
+        self.rng = RngStreams(seed if seed is not None else random.randrange(2**63))
+        self.profiler = Profiler(enabled=profile, trace=trace_path is not None)
         self.camera_offset = Vec2(0, 0)
-        self.dead = 0
-        self.screenshake = 0
+        self._previous_camera_offset = Vec2(0, 0)
+        self.sim = Simulation(
+            self.assets,
+            self.num_of_maps,
+            self.rng,
+            self.profiler,
+            on_load_level=self._reset_camera,
+        )
+        self.clouds = Clouds(
+            self.assets["clouds"],
+            rng=self.rng.clouds,
+            display_size=self.display.get_size(),
+        )
+        self.effects = EffectCache()
+        self.outline = OutlineRenderer(outline_mode, self.effects)
+        self.render_fps = render_fps
+        self.max_ticks_per_frame = max_ticks_per_frame
 
         self.movement = [False, False]
-        self.player = Player(self.assets, self.particles, Vec2(0, 0), Vec2(8, 15))
-
-        self.level = 0
-        self.transition = 0
-        self.load_level(self.level)
-
-    def load_level(self, map_id: int) -> None:
-        self.particles.clear()
-        self.projectiles.clear()
-        self.sparks.clear()
-        self.enemies.clear()
-        self.leaf_spawners.clear()
-        self.camera_offset = Vec2(0, 0)
-        self.dead = 0
-        self.transition = -30
-
-        self.tilemap.load(f"assets/maps/{map_id}.json")
-
-        player_tile = next(self.tilemap.extract("spawners", 0))
-        self.player.set_position(Vec2(player_tile["pos"]))
-
-        for enemy in self.tilemap.extract("spawners", 1):
-            self.enemies.append(
-                Enemy(
-                    self.assets,
-                    self.projectiles,
-                    self.sparks,
-                    self.player,
-                    Vec2(enemy["pos"]),
-                    Vec2(8, 15),
-                )
-            )
+        self._jump_pressed = False
+        self._dash_pressed = False
+        self.input_script = input_script
+        self.trace_path = trace_path
+        self.sim.load_level(self.sim.level)
+
+        self.record_path = record_path
+        self.recording = (
+            Replay(self.rng.seed, self.sim.level) if record_path is not None else None
+        )
 
-        for tree in self.tilemap.extract("large_decor", variant=2, keep=True):
-            x, y = tree["pos"]
-            self.leaf_spawners.append(pygame.Rect(x + 4, y + 4, 23, 13))
+    def _reset_camera(self) -> None:
+        self.camera_offset = Vec2(0, 0)
+        self._previous_camera_offset = Vec2(0, 0)
 
     def run(self) -> None:
         clock = pygame.time.Clock()
+        accumulator = 0.0
+        previous_time = time.perf_counter()
 
         while True:
-            # update each game element
-            self.screenshake = max(0, self.screenshake - 1)
-
-            if len(self.enemies) == 0:
-                self.transition += 1
-                if self.transition > 30:
-                    self.level = min(self.level + 1, self.num_of_maps - 1)
-                    self.load_level(self.level)
-            if self.transition < 0:
-                self.transition += 1
-
-            if self.player.is_dead and self.dead == 0:
-                self.screenshake = max(16, self.screenshake)
-                self.dead += 1
-
-            if self.dead == 0:
-                player_movement = Vec2(self.movement[1] - self.movement[0], 0)
-                self.player.update(self.tilemap, player_movement)
-            elif self.dead > 0:
-                self.dead += 1
-                self.transition = min(30, self.transition + 1)
-                if self.dead > 40:
-                    self.load_level(self.level)
-
-            self.clouds.update()
-
-            for enemy in self.enemies.copy():
-                enemy.update(self.tilemap)
-                if self.player.is_dashing and self.player.rect.colliderect(enemy.rect):
-                    self.screenshake = max(20, self.screenshake)
-                    self.enemies.remove(enemy)
-                    self._graphical_explosion(Vec2(enemy.rect.center))
-                    self.sparks.append(
-                        Spark(Vec2(enemy.rect.center), 0, 5 + random.random())
-                    )
-                    self.sparks.append(
-                        Spark(Vec2(enemy.rect.center), math.pi, 5 + random.random())
-                    )
-
-            for p in self.particles.copy():
-                if p.type == "leaf":
-                    p.position.x += math.sin(p.animation_frame * 0.035) * 0.3
-                if p.update():
-                    self.particles.remove(p)
-
-            for projectile in self.projectiles.copy():
-                projectile[0].x += projectile[1]
-                projectile[2] += 1
-                if self.tilemap.check_solid_tile(projectile[0]):
-                    self.projectiles.remove(projectile)
-                    for _ in range(4):
-                        if projectile[1] < 0:
-                            s = Spark(
-                                projectile[0].copy(),
-                                random.random() - 0.5,
-                                2 + random.random(),
-                            )
-                            self.sparks.append(s)
-                        if projectile[1] > 0:
-                            s = Spark(
-                                projectile[0].copy(),
-                                random.random() - 0.5 + math.pi,
-                                2 + random.random(),
-                            )
-                            self.sparks.append(s)
-
-                if (
-                    self.player.rect.collidepoint(projectile[0])
-                    and not self.player.is_dashing
-                ):
-                    self.projectiles.remove(projectile)
-                    self._graphical_explosion(projectile[0])
-                    self.dead += 1
-                    self.screenshake = max(16, self.screenshake)
-
-                if projectile[2] > 360:
-                    self.projectiles.remove(projectile)
-
-            for spark in self.sparks.copy():
-                if spark.update():
-                    self.sparks.remove(spark)
-
-            # spawn leafs
-            for spawner in self.leaf_spawners:
-                if random.random() * 39999 < spawner.width * spawner.height:
-                    x = spawner.x + random.random() * spawner.width
-                    y = spawner.y + random.random() * spawner.height
-                    self.particles.append(
-                        Particle(self.assets, "leaf", Vec2(x, y), Vec2(-0.1, 0.3))
-                    )
-
-            # render everything to the display
-            self.display.fill((0, 0, 0, 0))
-            self.display_2.blit(self.assets["background"], (0, 0))
-            render_offset = self._update_camera()
-            self.clouds.render(self.display_2, render_offset)
-            self.tilemap.render(self.display, render_offset)
-            for enemy in self.enemies:
-                enemy.render(self.display, render_offset)
-            if self.dead == 0:
-                self.player.render(self.display, render_offset)
-            for projectile in self.projectiles:
-                img: pygame.Surface = self.assets["projectile"].copy()
-                self.display.blit(
-                    img,
-                    (
-                        projectile[0].x - img.get_width() / 2 - render_offset.x,
-                        projectile[0].y - img.get_height() / 2 - render_offset.y,
-                    ),
-                )
-            for spark in self.sparks:
-                spark.render(self.display, render_offset)
-
-            display_mask = pygame.mask.from_surface(self.display)
-            display_sillhouette = display_mask.to_surface(
-                setcolor=(0, 0, 0, 180), unsetcolor=(0, 0, 0, 0)
-            )
-            for offset in [(-1, 0), (0, -1), (1, 0), (0, 1)]:
-                self.display_2.blit(display_sillhouette, offset)
-
-            for particle in self.particles:
-                particle.render(self.display, render_offset)
+            now = time.perf_counter()
+            accumulator += now - previous_time
+            previous_time = now
 
             self._handle_events()
-            self._update_screen()
 
-            clock.tick(60)
+            ticks = 0
+            while accumulator >= TICK and ticks < self.max_ticks_per_frame:
+                self.update()
+                accumulator -= TICK
+                ticks += 1
+            if ticks == self.max_ticks_per_frame:
+                # too far behind to catch up, let the game slow down instead
+                accumulator = min(accumulator, TICK)
+
+            self.render(accumulator / TICK)
+            self.profiler.end_frame()
+            clock.tick(self.render_fps)
+
+    def run_headless(self, frames: int) -> None:
+        """Run one tick and one render per frame, as fast as possible."""
+        for _ in range(frames):
+            self.update()
+            self.render()
+            self.profiler.end_frame()
+
+    def play_replay(self, replay: Replay) -> list[tuple[int, int, int]]:
+        """Run a recorded replay headlessly and check its state hashes.
+
+        The game must have been created with the seed of the replay and not
+        advanced yet. Returns the (tick, expected, actual) hash of every
+        checkpoint that did not match.
+        """
+        if self.rng.seed != replay.seed or self.sim.tick != 0:
+            raise ValueError("replays must run on a fresh game with their seed")
+
+        self.input_script = replay.input_script()
+        self.sim.level = replay.level
+        self.sim.load_level(replay.level)
+
+        desyncs = []
+        for _ in range(len(replay)):
+            self.update()
+            self.render()
+            self.profiler.end_frame()
+
+            expected = replay.checkpoints.get(self.sim.tick)
+            if expected is not None:
+                actual = self.state_hash()
+                if actual != expected:
+                    desyncs.append((self.sim.tick, expected, actual))
+
+        return desyncs
+
+    def state_hash(self) -> int:
+        tick, level, dead, transition, *entities = self.sim.state()
+        return state_hash(
+            (tick, level, dead, transition, tuple(self.camera_offset), *entities)
+        )
 
-    def _graphical_explosion(self, position: Vec2) -> None:
-        for _ in range(30):
-            angle = random.random() * math.pi * 2
-            s = Spark(
-                position.copy(),
-                angle,
-                random.random() + 2,
+    def update(self) -> None:
+        """Advance the simulation by one fixed tick of TICK seconds."""
+        input_frame = self._next_input()
+        if self.recording is not None:
+            self.recording.record(input_frame)
+        self._previous_camera_offset.update(self.camera_offset)
+        self.sim.step(input_frame)
+        self.clouds.update()
+        self._update_camera()
+
+        tick = self.sim.tick
+        if self.recording is not None and tick % CHECKPOINT_INTERVAL == 0:
+            self.recording.checkpoints[tick] = self.state_hash()
+
+    def render(self, alpha: float = 1.0) -> None:
+        """Draw the current state, `alpha` of the way from the previous tick."""
+        sim = self.sim
+        camera_offset = self._previous_camera_offset.lerp(self.camera_offset, alpha)
+        render_offset = Vec2(int(camera_offset.x), int(camera_offset.y))
+
+        with self.profiler.scope("render/background"):
+            self.display.fill((0, 0, 0, 0))
+            self.display_2.blit(self.assets["background"], (0, 0))
+            blits = 1 + self.clouds.render(self.display_2, render_offset)
+        with self.profiler.scope("render/tilemap"):
+            blits += sim.tilemap.render(self.display, render_offset)
+        with self.profiler.scope("render/sprites"):
+            for enemy in sim.enemies:
+                enemy.render(self.display, render_offset, self.outline, alpha)
+            if sim.dead == 0:
+                sim.player.render(self.display, render_offset, self.outline, alpha)
+            sim.projectiles.render(
+                self.display, self.assets["projectile"], render_offset, self.outline
             )
-            self.sparks.append(s)
-
-            speed = random.random() * 5
-            p = Particle(
-                self.assets,
-                "particle",
-                position.copy(),
-                velocity=Vec2(
-                    math.cos(angle + math.pi) * speed * 0.5,
-                    math.sin(angle + math.pi) * speed * 0.5,
-                ),
-                frame=random.randint(0, 3),
+            sim.sparks.render(self.display, render_offset, self.outline)
+        with self.profiler.scope("render/outline"):
+            blits += self.outline.render(
+                self.display, self.display_2, sim.tilemap, render_offset
             )
-            self.particles.append(p)
-
-    def _update_camera(self) -> Vec2:
+        with self.profiler.scope("render/particles"):
+            sim.particles.render(self.display, render_offset)
+
+        if self.profiler.enabled:
+            # 2 per enemy (body and gun), 1 for the player
+            blits += 2 * len(sim.enemies) + (sim.dead == 0)
+            blits += len(sim.projectiles) + len(sim.particles)
+            self.profiler.count("blits", blits)
+            self.profiler.count("entities", len(sim.enemies) + 1)
+            self.profiler.count("enemies active", sim.active_enemies)
+            self.profiler.count("enemies reduced", sim.reduced_enemies)
+            self.profiler.count("enemies sleeping", sim.sleeping_enemies)
+            self.profiler.count("enemies resting", sim.resting_enemies)
+            self.profiler.count("particles", len(sim.particles))
+            self.profiler.count("sparks", len(sim.sparks))
+            self.profiler.count("projectiles", len(sim.projectiles))
+            self.profiler.count("effect surfaces", self.effects.allocations)
+        self.profiler.render_overlay(self.display)
+
+        self._update_screen()
+
+    def _update_camera(self) -> None:
         self.camera_offset += (
-            self.player.rect.center - self.display_center - self.camera_offset
+            self.sim.player.rect.center - self.display_center - self.camera_offset
         ) / 20
-        return Vec2(int(self.camera_offset.x), int(self.camera_offset.y))
+
+    def _next_input(self) -> InputFrame:
+        if self.input_script is not None:
+            return self.input_script(self.sim.tick)
+
+        input_frame = InputFrame(
+            self.movement[0], self.movement[1], self._jump_pressed, self._dash_pressed
+        )
+        self._jump_pressed = False
+        self._dash_pressed = False
+        return input_frame
 
     def _handle_events(self) -> None:
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit()
+                self.quit()
             elif event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_d:
                     self.movement[1] = True
                 elif event.key == pygame.K_a:
                     self.movement[0] = True
                 elif event.key == pygame.K_w or event.key == pygame.K_SPACE:
-                    self.player.jump()
+                    self._jump_pressed = True
                 elif event.key == pygame.K_j:
-                    self.player.dash()
+                    self._dash_pressed = True
+                elif event.key == pygame.K_F3:
+                    self.profiler.overlay = not self.profiler.overlay
+                    if self.profiler.overlay:
+                        self.profiler.enabled = True
             elif event.type == pygame.KEYUP:
                 if event.key == pygame.K_d:
                     self.movement[1] = False
                 elif event.key == pygame.K_a:
                     self.movement[0] = False
 
+    def quit(self) -> None:
+        if self.trace_path is not None:
+            self.profiler.dump_trace(self.trace_path)
+        if self.recording is not None:
+            self.recording.save(self.record_path)
+        self.assets.shutdown()
+        pygame.quit()
+        sys.exit()
+
     def _update_screen(self) -> None:
-        if self.transition != 0:
-            transition_surf = pygame.Surface(self.display.get_size())
-            pygame.draw.circle(
-                transition_surf,
-                (255, 255, 255),
-                self.display_center,
-                (30 - abs(self.transition)) * 8,
+        sim = self.sim
+        if sim.transition != 0:
+            self.display.blit(
+                self.effects.transition_mask(
+                    self.display.get_size(), abs(sim.transition)
+                ),
+                (0, 0),
             )
-            transition_surf.set_colorkey((255, 255, 255))
-            self.display.blit(transition_surf, (0, 0))
 
         self.display_2.blit(self.display, (0, 0))
         screenshake_offset = (
-            random.random() * self.screenshake - self.screenshake / 2,
-            random.random() * self.screenshake - self.screenshake / 2,
-        )
-        self.screen.blit(
-            pygame.transform.scale(self.display_2, self.screen.get_size()),
-            screenshake_offset,
+            self.rng.screenshake.random() * sim.screenshake - sim.screenshake / 2,
+            self.rng.screenshake.random() * sim.screenshake - sim.screenshake / 2,
         )
-        pygame.display.update()
+        with self.profiler.scope("present/scale"):
+            self.presenter.present(self.display_2, screenshake_offset)
+        with self.profiler.scope("present/display"):
+            self.presenter.update()
 
 
 if __name__ == "__main__":
-    game = Game()
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--outline",
+        choices=OUTLINE_MODES,
+        default="cached",
+        help="cached per chunk/sprite outlines or the full-screen mask pass",
+    )
+    parser.add_argument(
+        "--fps",
+        type=int,
+        default=60,
+        help="render frame rate cap, 0 for uncapped (simulation always runs "
+        f"at {TICK_RATE} ticks per second)",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="time every frame phase and show the overlay (toggle with F3)",
+    )
+    parser.add_argument(
+        "--trace",
+        metavar="FILE",
+        help="record a Chrome trace of every frame phase, written on exit",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        help="seed of the game random generators (random by default)",
+    )
+    parser.add_argument(
+        "--record",
+        metavar="FILE",
+        help="record the inputs of this run to a replay file, written on exit",
+    )
+    parser.add_argument(
+        "--replay",
+        metavar="FILE",
+        help="play a replay file headlessly and verify its state checkpoints",
+    )
+    args = parser.parse_args()
+
+    if args.replay:
+        replay = Replay.load(args.replay)
+        game = Game(
+            outline_mode=args.outline,
+            headless=True,
+            profile=args.profile,
+            trace_path=args.trace,
+            seed=replay.seed,
+        )
+        start = time.perf_counter()
+        desyncs = game.play_replay(replay)
+        elapsed = time.perf_counter() - start
+
+        print(f"{len(replay)} ticks in {elapsed:.2f}s ({len(replay) / elapsed:.0f}/s)")
+        for tick, expected, actual in desyncs:
+            print(f"desync at tick {tick}: expected {expected:016x}, got {actual:016x}")
+        if args.trace:
+            game.profiler.dump_trace(args.trace)
+        sys.exit(1 if desyncs else 0)
+
+    game = Game(
+        outline_mode=args.outline,
+        render_fps=args.fps,
+        profile=args.profile,
+        trace_path=args.trace,
+        seed=args.seed,
+        record_path=args.record,
+    )
+    game.profiler.overlay = args.profile
     game.run()
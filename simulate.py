@@ -0,0 +1,215 @@
+"""Play many headless episodes in parallel and summarize their outcomes.
+
+Every episode plays one map on a fresh Simulation with its own seed, until
+the level is cleared or the tick limit is reached. Episodes are spread over
+a pool of worker processes, e.g.
+
+    python simulate.py --episodes 100 --agent random --workers 8
+    python simulate.py --maps 0 2 --agent patrol --output outcomes.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import pygame  # noqa: E402
+
+from src.AssetManager import AssetManager  # noqa: E402
+from src.assets import map_count, register_game_assets  # noqa: E402
+from src.Input import InputFrame, InputScript, patrol_script  # noqa: E402
+from src.Rng import RngStreams  # noqa: E402
+from src.Simulation import Simulation  # noqa: E402
+
+AGENTS = ("patrol", "random")
+
+
+class RandomAgent:
+    """Holds a random direction for a while, jumping and dashing at random."""
+
+    def __init__(self, seed: int) -> None:
+        self._rng = random.Random(f"{seed}/agent")
+        self._right = True
+        self._until = 0
+
+    def __call__(self, tick: int) -> InputFrame:
+        rng = self._rng
+        if tick >= self._until:
+            self._right = rng.random() < 0.5
+            self._until = tick + rng.randint(30, 240)
+        return InputFrame(
+            left=not self._right,
+            right=self._right,
+            jump=rng.random() < 1 / 30,
+            dash=rng.random() < 1 / 90,
+        )
+
+
+class Episode(NamedTuple):
+    map_id: int
+    seed: int
+    agent: str
+    max_ticks: int
+
+
+class Outcome(NamedTuple):
+    map_id: int
+    seed: int
+    ticks: int
+    deaths: int
+    cleared: bool
+    enemies_left: int
+
+
+# per worker process, see _init_worker
+_assets: AssetManager | None = None
+_num_of_maps = 0
+
+
+def _init_worker() -> None:
+    global _assets, _num_of_maps
+
+    # images are converted to the display format, even without a window
+    pygame.display.init()
+    pygame.display.set_mode((1, 1))
+    _assets = AssetManager()
+    _num_of_maps = register_game_assets(_assets)
+
+
+def _agent(name: str, seed: int) -> InputScript:
+    if name == "random":
+        return RandomAgent(seed)
+    return patrol_script
+
+
+def run_episode(episode: Episode) -> Outcome:
+    sim = Simulation(_assets, _num_of_maps, RngStreams(episode.seed))
+    sim.level = episode.map_id
+    sim.load_level(episode.map_id)
+    agent = _agent(episode.agent, episode.seed)
+
+    while sim.tick < episode.max_ticks and sim.levels_cleared == 0:
+        sim.step(agent(sim.tick))
+
+    return Outcome(
+        episode.map_id,
+        episode.seed,
+        sim.tick,
+        sim.deaths,
+        sim.levels_cleared > 0,
+        # the next level is already loaded once cleared
+        0 if sim.levels_cleared else len(sim.enemies),
+    )
+
+
+def run_episodes(episodes: list[Episode], workers: int) -> list[Outcome]:
+    """Play `episodes`, in this process when `workers` is 1."""
+    if workers == 1:
+        _init_worker()
+        return [run_episode(episode) for episode in episodes]
+
+    # episodes of one map are kept together, so a worker rarely reloads maps
+    chunksize = max(1, len(episodes) // (workers * 4))
+    with ProcessPoolExecutor(workers, initializer=_init_worker) as executor:
+        return list(executor.map(run_episode, episodes, chunksize=chunksize))
+
+
+def summarize(outcomes: list[Outcome], elapsed: float) -> dict:
+    maps = {}
+    for outcome in outcomes:
+        summary = maps.setdefault(
+            outcome.map_id,
+            {"episodes": 0, "clears": 0, "deaths": 0, "ticks": 0, "clear_ticks": 0},
+        )
+        summary["episodes"] += 1
+        summary["deaths"] += outcome.deaths
+        summary["ticks"] += outcome.ticks
+        if outcome.cleared:
+            summary["clears"] += 1
+            summary["clear_ticks"] += outcome.ticks
+
+    for summary in maps.values():
+        clears = summary.pop("clears")
+        clear_ticks = summary.pop("clear_ticks")
+        summary["clear_rate"] = clears / summary["episodes"]
+        summary["mean_ticks_to_clear"] = clear_ticks / clears if clears else None
+
+    ticks = sum(outcome.ticks for outcome in outcomes)
+    return {
+        "episodes": len(outcomes),
+        "ticks": ticks,
+        "elapsed_s": elapsed,
+        "ticks_per_second": ticks / elapsed,
+        "maps": {map_id: maps[map_id] for map_id in sorted(maps)},
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--episodes", type=int, default=20, help="episodes per map (default: 20)"
+    )
+    parser.add_argument("--maps", type=int, nargs="*", help="map ids (default: all)")
+    parser.add_argument("--agent", choices=AGENTS, default="random")
+    parser.add_argument(
+        "--max-ticks",
+        type=int,
+        default=3600,
+        help="ticks before an uncleared episode ends (default: 3600)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="worker processes, 1 plays in this process (default: one per core)",
+    )
+    parser.add_argument(
+        "--seed", type=int, default=0, help="seed of the first episode, then +1"
+    )
+    parser.add_argument("--output", help="also write every outcome as JSON")
+    args = parser.parse_args()
+
+    maps = args.maps if args.maps else range(map_count())
+    episodes = [
+        Episode(map_id, args.seed + i, args.agent, args.max_ticks)
+        for i, map_id in enumerate(
+            map_id for map_id in maps for _ in range(args.episodes)
+        )
+    ]
+
+    start = time.perf_counter()
+    outcomes = run_episodes(episodes, args.workers)
+    report = summarize(outcomes, time.perf_counter() - start)
+
+    for map_id, summary in report["maps"].items():
+        mean_ticks = summary["mean_ticks_to_clear"]
+        print(
+            f"map {map_id}: {summary['episodes']} episodes, "
+            f"cleared {summary['clear_rate']:.0%}, {summary['deaths']} deaths, "
+            "mean ticks to clear "
+            + (f"{mean_ticks:.0f}" if mean_ticks is not None else "-")
+        )
+    print(
+        f"{report['ticks']} ticks in {report['elapsed_s']:.2f}s "
+        f"({report['ticks_per_second']:.0f} ticks/s, {args.workers} workers)"
+    )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(
+                {**report, "outcomes": [outcome._asdict() for outcome in outcomes]},
+                f,
+                indent=2,
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -2,31 +2,57 @@ from __future__ import annotations
 
 import pygame
 
+from src.utils import flip_images
+
 
 class Animation:
+    """Immutable animation clip shared by everything that plays it.
+
+    Playback state is a plain int frame counter kept by the owner, advanced
+    with `next_frame` and turned into an image with `img`.
+    """
+
     def __init__(
         self, images: list[pygame.Surface], duration: int = 5, loop=True
     ) -> None:
         self._images = images
         self._duration = duration
         self._loop = loop
-        self._done = False
-        self._frame = 0
+        self._length = duration * len(images)
 
-    def img(self) -> pygame.Surface:
-        return self._images[int(self._frame / self._duration)]
+        # image shown at every value of the frame counter
+        self._frames = [images[i // duration] for i in range(self._length)]
+        self._flipped_frames = [
+            flipped for flipped in flip_images(images) for _ in range(duration)
+        ]
 
-    def update(self) -> None:
+    def img(self, frame: int, flip: bool = False) -> pygame.Surface:
+        return self._flipped_frames[frame] if flip else self._frames[frame]
+
+    def next_frame(self, frame: int) -> int:
         if self._loop:
-            self._frame = (self._frame + 1) % (self._duration * len(self._images))
-        else:
-            self._frame = min(self._frame + 1, self._duration * len(self._images) - 1)
-            if self._frame >= self._duration * len(self._images) - 1:
-                self._done = True
+            return (frame + 1) % self._length
+        return min(frame + 1, self._length - 1)
+
+    def is_done(self, frame: int) -> bool:
+        return not self._loop and frame >= self._length - 1
+
+    @property
+    def frames(self) -> list[pygame.Surface]:
+        return self._frames
+
+    @property
+    def images(self) -> list[pygame.Surface]:
+        return self._images
 
-    def copy(self) -> Animation:
-        return Animation(self._images, self._duration, self._loop)
+    @property
+    def duration(self) -> int:
+        return self._duration
+
+    @property
+    def loop(self) -> bool:
+        return self._loop
 
     @property
-    def done(self) -> bool:
-        return self._done
+    def length(self) -> int:
+        return self._length
@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Iterable
+
+
+class AssetManager:
+    """Loads named assets on first use and keeps them until evicted.
+
+    Every asset is registered with a loader. `prefetch` runs loaders on a
+    worker thread ahead of time, a later lookup waits for the pending load
+    instead of starting another. Assets registered with `level=True` stay
+    resident only while they belong to the current level, see `set_level`.
+    """
+
+    def __init__(self) -> None:
+        self._loaders: dict[str, Callable[[], Any]] = {}
+        self._level_assets: set[str] = set()
+        self._loaded: dict[str, Any] = {}
+        self._pending: dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._executor: ThreadPoolExecutor | None = None
+
+        self.loads = 0
+        self.evictions = 0
+
+    def register(
+        self, name: str, loader: Callable[[], Any], level: bool = False
+    ) -> None:
+        self._loaders[name] = loader
+        if level:
+            self._level_assets.add(name)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._loaders
+
+    def __getitem__(self, name: str) -> Any:
+        try:
+            return self._loaded[name]
+        except KeyError:
+            return self._load(name)
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._loaded
+
+    def _load(self, name: str) -> Any:
+        with self._lock:
+            if name in self._loaded:
+                return self._loaded[name]
+            future = self._pending.get(name)
+
+        if future is not None:
+            return future.result()
+
+        asset = self._loaders[name]()
+        with self._lock:
+            self._loaded[name] = asset
+            self.loads += 1
+        return asset
+
+    def _load_pending(self, name: str) -> Any:
+        try:
+            asset = self._loaders[name]()
+            with self._lock:
+                self._loaded[name] = asset
+                self.loads += 1
+            return asset
+        finally:
+            with self._lock:
+                del self._pending[name]
+
+    def prefetch(self, names: Iterable[str]) -> None:
+        """Start loading assets in the background, if not loaded already."""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=1, thread_name_prefix="assets"
+                )
+            for name in names:
+                if name not in self._loaded and name not in self._pending:
+                    self._pending[name] = self._executor.submit(
+                        self._load_pending, name
+                    )
+
+    def set_level(self, names: Iterable[str]) -> None:
+        """Evict the level assets that are not in `names`."""
+        keep = set(names)
+        with self._lock:
+            for name in self._level_assets - keep:
+                if name in self._loaded:
+                    del self._loaded[name]
+                    self.evictions += 1
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+
+import pygame
+
+ATLAS_VERSION = 1
+ATLAS_DIR = "build/atlas/"
+ATLAS_MANIFEST = ATLAS_DIR + "atlas.json"
+ATLAS_IMAGE = ATLAS_DIR + "atlas.png"
+ATLAS_RAW = ATLAS_DIR + "atlas.raw"
+
+
+def source_fingerprint(images_dir: str) -> str:
+    """Hash of the path, size and modification time of every source image
+
+    Args:
+        images_dir (str): directory the atlas is built from
+
+    Returns:
+        str: hex digest, changes whenever an image is added, removed or edited
+    """
+    digest = hashlib.sha1()
+    directories = [images_dir]
+
+    while directories:
+        for entry in sorted(os.scandir(directories.pop()), key=lambda e: e.name):
+            if entry.is_dir():
+                directories.append(entry.path)
+            elif entry.name.endswith(".png"):
+                stat = entry.stat()
+                digest.update(
+                    f"{entry.path}:{stat.st_size}:{stat.st_mtime_ns};".encode()
+                )
+
+    return digest.hexdigest()
+
+
+class Atlas:
+    """All game images packed into one surface, handed out as subsurfaces.
+
+    Built by build_atlas.py; images are keyed by their path relative to the
+    images directory, e.g. "tiles/grass/0.png".
+    """
+
+    def __init__(
+        self, surface: pygame.Surface, rects: dict[str, tuple[int, int, int, int]]
+    ) -> None:
+        self._surface = surface
+        self._rects = rects
+        self._images: dict[str, pygame.Surface] = {}
+        # file names of the images directly inside every directory, sorted
+        self._dirs: dict[str, list[str]] = {}
+
+        for path in sorted(rects):
+            directory, name = os.path.split(path)
+            self._dirs.setdefault(directory, []).append(name)
+
+    @classmethod
+    def load(cls, images_dir: str) -> Atlas | None:
+        """Load the built atlas, None if it is missing or out of date
+
+        Needs a display mode to be set, like every converted image.
+        """
+        try:
+            with open(ATLAS_MANIFEST, "r") as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            return None
+
+        if manifest["version"] != ATLAS_VERSION or manifest[
+            "fingerprint"
+        ] != source_fingerprint(images_dir):
+            return None
+
+        size = tuple(manifest["size"])
+        if os.path.exists(ATLAS_RAW):
+            # raw pixels skip PNG decoding
+            with open(ATLAS_RAW, "rb") as f:
+                surface = pygame.image.frombytes(f.read(), size, "RGB")
+        else:
+            surface = pygame.image.load(ATLAS_IMAGE)
+
+        surface = surface.convert()
+        surface.set_colorkey((0, 0, 0))
+        rects = {path: tuple(rect) for path, rect in manifest["images"].items()}
+        return cls(surface, rects)
+
+    def __contains__(self, path: str) -> bool:
+        return path in self._rects
+
+    def image(self, path: str) -> pygame.Surface:
+        if path not in self._images:
+            self._images[path] = self._surface.subsurface(self._rects[path])
+        return self._images[path]
+
+    def images(self, directory: str) -> list[pygame.Surface]:
+        return [self.image(directory + "/" + name) for name in self._dirs[directory]]
+
+    def has_dir(self, directory: str) -> bool:
+        return directory in self._dirs
@@ -0,0 +1,442 @@
+from __future__ import annotations
+
+import random
+from typing import NamedTuple, Sequence
+
+from src.AssetManager import AssetManager
+from src.entities.Entity import G_FORCE, TERMINAL_VELOCITY
+from src.Input import INPUT_DASH, INPUT_JUMP, INPUT_LEFT, INPUT_RIGHT
+from src.ProjectileSystem import PROJECTILE_LIFETIME
+from src.Rng import RngStreams
+from src.Simulation import ACTIVE_AREA, AWAKE_AREA, REDUCED_RATE
+from src.Tilemap import (
+    COLLISION_DOWN,
+    COLLISION_LEFT,
+    COLLISION_RIGHT,
+    COLLISION_UP,
+    Tilemap,
+)
+
+# done codes returned by BatchEnv.step, 0 while a copy is still playing
+RUNNING = 0
+DEAD = 1
+CLEARED = 2
+TIMEOUT = 3
+
+PLAYER_SIZE = (8, 15)
+ENEMY_SIZE = (8, 15)
+
+
+class BatchObservation(NamedTuple):
+    """One list per field, with one entry per copy of the level.
+
+    The enemy fields hold `BatchEnv.enemies` entries per copy, copy i from
+    index i * enemies. The projectile fields hold `projectile_capacity`
+    entries per copy, of which the first `projectiles[i]` are live.
+    """
+
+    x: list[float]
+    y: list[float]
+    velocity_x: list[float]
+    velocity_y: list[float]
+    collisions: list[int]  # COLLISION_* bits of the last step
+    air_time: list[int]
+    dashing: list[int]
+    jumps: list[int]
+    enemies_left: list[int]
+    enemy_x: list[float]
+    enemy_y: list[float]
+    enemy_alive: bytearray
+    projectiles: list[int]
+    projectile_x: list[float]
+    projectile_y: list[float]
+    projectile_direction: list[float]
+
+
+class BatchEnv:
+    """Copies of one level stepped in lockstep, for training and fuzzing.
+
+    The player, enemies and projectiles of every copy are stored as parallel
+    lists, advanced by a single loop per step against the collisions of a
+    shared Tilemap. Every tick follows Simulation.step: Player, Enemy and
+    ProjectileSystem updates, the enemy update schedule, dash kills and
+    projectile hits, without the animations, particles and sparks. Each copy
+    draws its enemies' random numbers from its own generator, the same one
+    as a Simulation seeded with `seed + i`.
+
+    `reset` starts every copy and must be called before the first `step`,
+    which takes one input bitmask per copy (see src.Input.encode_input) and
+    returns the observation columns and a done code per copy: CLEARED when
+    the last enemy dies, which the game clears even if the player dies
+    after, DEAD when the player falls for too long or is shot. Finished
+    copies are reset right away, so their observation is the reset state.
+    The returned lists are reused, they change with the next step.
+    """
+
+    def __init__(
+        self,
+        tilemap: Tilemap,
+        count: int,
+        max_steps: int = 3600,
+        seed: int = 0,
+        projectile_capacity: int = 256,
+    ) -> None:
+        self.count = count
+        self.max_steps = max_steps
+        self.seed = seed
+        self.projectile_capacity = projectile_capacity
+        self._tilemap = tilemap
+
+        player_tile = next(tilemap.extract("spawners", 0, keep=True))
+        self._spawn = player_tile["pos"]
+        self._enemy_spawns = [
+            enemy["pos"] for enemy in tilemap.extract("spawners", 1, keep=True)
+        ]
+        self.enemies = len(self._enemy_spawns)
+
+        self._x = [0.0] * count
+        self._y = [0.0] * count
+        self._velocity_x = [0.0] * count
+        self._velocity_y = [0.0] * count
+        self._collisions = [0] * count
+        self._air_time = [0] * count
+        self._dashing = [0] * count
+        self._jumps = [0] * count
+        self._enemies_left = [0] * count
+        self._wall_slide = [False] * count
+        self._flip = [False] * count
+        self._last_movement = [0] * count
+        self._steps = [0] * count
+        self._rngs = [random.Random() for _ in range(count)]
+
+        enemies = count * self.enemies
+        self._enemy_x = [0.0] * enemies
+        self._enemy_y = [0.0] * enemies
+        self._enemy_velocity_y = [0.0] * enemies
+        self._enemy_flip = [False] * enemies
+        self._enemy_walking = [0] * enemies
+        # one byte per enemy of every copy, 1 while alive
+        self._alive = bytearray(enemies)
+
+        projectiles = count * projectile_capacity
+        self._projectiles = [0] * count
+        self._projectile_x = [0.0] * projectiles
+        self._projectile_y = [0.0] * projectiles
+        self._projectile_direction = [0.0] * projectiles
+        self._projectile_timer = [0] * projectiles
+
+        self._dones = bytearray(count)
+        self._started = False
+
+        self.observation = BatchObservation(
+            self._x,
+            self._y,
+            self._velocity_x,
+            self._velocity_y,
+            self._collisions,
+            self._air_time,
+            self._dashing,
+            self._jumps,
+            self._enemies_left,
+            self._enemy_x,
+            self._enemy_y,
+            self._alive,
+            self._projectiles,
+            self._projectile_x,
+            self._projectile_y,
+            self._projectile_direction,
+        )
+
+    @classmethod
+    def from_map(
+        cls,
+        assets: AssetManager,
+        map_id: int,
+        count: int,
+        max_steps: int = 3600,
+        seed: int = 0,
+    ) -> BatchEnv:
+        """Batch of the map registered as "map/<map_id>" in `assets`."""
+        tilemap = Tilemap(assets, tile_size=16)
+        tilemap.load_data(*assets[f"map/{map_id}"])
+        return cls(tilemap, count, max_steps, seed)
+
+    def reset(self) -> BatchObservation:
+        """Restart every copy, reseeding its generator."""
+        for i in range(self.count):
+            self._rngs[i] = RngStreams(self.seed + i).enemies
+            self._reset(i)
+        self._started = True
+        return self.observation
+
+    def _reset(self, i: int) -> None:
+        self._x[i], self._y[i] = self._spawn
+        self._velocity_x[i] = self._velocity_y[i] = 0.0
+        self._collisions[i] = 0
+        self._air_time[i] = 0
+        self._dashing[i] = 0
+        self._jumps[i] = 1
+        self._wall_slide[i] = False
+        self._flip[i] = False
+        self._last_movement[i] = 0
+        self._steps[i] = 0
+
+        enemies = self.enemies
+        base = i * enemies
+        for j, (x, y) in enumerate(self._enemy_spawns):
+            self._enemy_x[base + j], self._enemy_y[base + j] = x, y
+            self._enemy_velocity_y[base + j] = 0.0
+            self._enemy_flip[base + j] = False
+            self._enemy_walking[base + j] = 0
+        self._alive[base : base + enemies] = b"\x01" * enemies
+        self._enemies_left[i] = enemies
+        self._projectiles[i] = 0
+
+    def step(self, actions: Sequence[int]) -> tuple[BatchObservation, bytearray]:
+        """Advance every copy by one tick with its input bitmask."""
+        if not self._started:
+            raise RuntimeError("BatchEnv.reset must be called before step")
+
+        xs, ys = self._x, self._y
+        velocities_x, velocities_y = self._velocity_x, self._velocity_y
+        collisions_, air_times = self._collisions, self._air_time
+        dashings, jumps_, wall_slides = self._dashing, self._jumps, self._wall_slide
+        flips, last_movements = self._flip, self._last_movement
+        enemy_xs, enemy_ys = self._enemy_x, self._enemy_y
+        enemy_velocities_y, enemy_flips = self._enemy_velocity_y, self._enemy_flip
+        walkings, alive, enemies_left = (
+            self._enemy_walking,
+            self._alive,
+            self._enemies_left,
+        )
+        projectiles, capacity = self._projectiles, self.projectile_capacity
+        projectile_xs, projectile_ys = self._projectile_x, self._projectile_y
+        directions, timers = self._projectile_direction, self._projectile_timer
+        enemies = self.enemies
+        width, height = PLAYER_SIZE
+        enemy_width, enemy_height = ENEMY_SIZE
+        move_box = self._tilemap.move_box
+        check_solid_tile = self._tilemap.check_solid_tile
+        dones = self._dones
+
+        for i in range(self.count):
+            action = actions[i]
+            movement = bool(action & INPUT_RIGHT) - bool(action & INPUT_LEFT)
+            velocity_x, velocity_y = velocities_x[i], velocities_y[i]
+            air_time, dashing, flip = air_times[i], dashings[i], flips[i]
+
+            # Player.jump and Player.dash
+            if action & INPUT_JUMP:
+                if wall_slides[i]:
+                    if flip and last_movements[i] < 0:
+                        velocity_x = 3.5
+                    elif not flip and last_movements[i] > 0:
+                        velocity_x = -3.5
+                    velocity_y = -2.5
+                    jumps_[i] = max(jumps_[i] - 1, 0)
+                elif jumps_[i] > 0:
+                    velocity_y = -3
+                    jumps_[i] -= 1
+                air_time = 5
+            if action & INPUT_DASH and dashing == 0:
+                dashing = 60
+
+            # Entity.update
+            last_movements[i] = movement
+            if movement > 0:
+                flip = False
+            elif movement < 0:
+                flip = True
+            x, y, collisions = move_box(
+                xs[i], ys[i], width, height, movement + velocity_x, velocity_y
+            )
+            velocity_y = min(TERMINAL_VELOCITY, velocity_y + G_FORCE)
+            if collisions & (COLLISION_UP | COLLISION_DOWN):
+                velocity_y = 0
+
+            # Player.update
+            if velocity_x > 0:
+                velocity_x = max(velocity_x - 0.1, 0)
+            elif velocity_x < 0:
+                velocity_x = min(velocity_x + 0.1, 0)
+
+            air_time += 1
+            dead = air_time > 120
+            if collisions & COLLISION_DOWN:
+                air_time = 0
+                jumps_[i] = 1
+
+            wall_slides[i] = False
+            if air_time > 4 and collisions & (COLLISION_RIGHT | COLLISION_LEFT):
+                wall_slides[i] = True
+                flip = bool(collisions & COLLISION_LEFT)
+                velocity_y = min(velocity_y, 0.5)
+
+            if dashing > 0:
+                dashing -= 1
+            if dashing > 50:
+                velocity_x = 8 * (-1 if flip else 1)
+                if dashing == 51:
+                    velocity_x *= 0.1
+
+            xs[i], ys[i] = x, y
+            velocities_x[i], velocities_y[i] = velocity_x, velocity_y
+            collisions_[i] = collisions
+            air_times[i], dashings[i], flips[i] = air_time, dashing, flip
+            self._steps[i] += 1
+
+            # Simulation._update_enemies, around the player's rect center
+            left, top = int(x), int(y)
+            center_x, center_y = left + width // 2, top + height // 2
+            active_left = center_x - ACTIVE_AREA[0] // 2
+            active_top = center_y - ACTIVE_AREA[1] // 2
+            awake_left = center_x - AWAKE_AREA[0] // 2
+            awake_top = center_y - AWAKE_AREA[1] // 2
+            tick = self._steps[i]
+            rng = self._rngs[i]
+            base = i * enemies
+            projectile_base = i * capacity
+            rank = 0
+
+            for k in range(base, base + enemies):
+                if not alive[k]:
+                    continue
+                enemy_left, enemy_top = int(enemy_xs[k]), int(enemy_ys[k])
+                staggered = (tick + rank) % REDUCED_RATE == 0
+                rank += 1
+                if not (
+                    active_left < enemy_left + enemy_width
+                    and enemy_left < active_left + ACTIVE_AREA[0]
+                    and active_top < enemy_top + enemy_height
+                    and enemy_top < active_top + ACTIVE_AREA[1]
+                ) and not (
+                    staggered
+                    and awake_left < enemy_left + enemy_width
+                    and enemy_left < awake_left + AWAKE_AREA[0]
+                    and awake_top < enemy_top + enemy_height
+                    and enemy_top < awake_top + AWAKE_AREA[1]
+                ):
+                    continue
+
+                # Enemy.update
+                enemy_movement = 0.0
+                enemy_flip = enemy_flips[k]
+                walking = walkings[k]
+                enemy_center_x = enemy_left + enemy_width // 2
+                enemy_center_y = enemy_top + enemy_height // 2
+                if walking > 0:
+                    ahead_x = enemy_center_x + (-8 if enemy_flip else 8)
+                    if check_solid_tile(
+                        (ahead_x, enemy_center_y + 16)
+                    ) and not check_solid_tile((ahead_x, enemy_center_y)):
+                        enemy_movement = -0.5 if enemy_flip else 0.5
+                    else:
+                        enemy_flip = not enemy_flip
+
+                    walking -= 1
+
+                    # Enemy._shoot
+                    if walking == 0 and abs(y - enemy_ys[k]) < 16:
+                        if enemy_flip and x < enemy_xs[k]:
+                            direction, muzzle_x = -1.5, enemy_center_x - 7
+                        elif not enemy_flip and x > enemy_xs[k]:
+                            direction, muzzle_x = 1.5, enemy_center_x + 7
+                        else:
+                            direction = 0.0
+                        if direction:
+                            if projectiles[i] < capacity:
+                                p = projectile_base + projectiles[i]
+                                projectile_xs[p] = muzzle_x
+                                projectile_ys[p] = enemy_center_y
+                                directions[p] = direction
+                                timers[p] = 0
+                                projectiles[i] += 1
+                            # the sparks of the shot, from the same generator
+                            for _ in range(8):
+                                rng.random()
+                elif rng.random() < 0.01:
+                    walking = rng.randint(30, 120)
+
+                if enemy_movement == 0 and check_solid_tile(
+                    (enemy_center_x, enemy_top + enemy_height)
+                ):
+                    # Entity._rest
+                    enemy_ys[k] = enemy_top
+                    enemy_velocities_y[k] = 0
+                else:
+                    if enemy_movement > 0:
+                        enemy_flip = False
+                    elif enemy_movement < 0:
+                        enemy_flip = True
+                    enemy_velocity_y = enemy_velocities_y[k]
+                    enemy_xs[k], enemy_ys[k], enemy_collisions = move_box(
+                        enemy_xs[k],
+                        enemy_ys[k],
+                        enemy_width,
+                        enemy_height,
+                        enemy_movement,
+                        enemy_velocity_y,
+                    )
+                    enemy_velocity_y = min(
+                        TERMINAL_VELOCITY, enemy_velocity_y + G_FORCE
+                    )
+                    if enemy_collisions & (COLLISION_UP | COLLISION_DOWN):
+                        enemy_velocity_y = 0
+                    enemy_velocities_y[k] = enemy_velocity_y
+                enemy_flips[k] = enemy_flip
+                walkings[k] = walking
+
+            # dashing through enemies, as in Simulation.step
+            if dashing >= 50:
+                for k in range(base, base + enemies):
+                    if alive[k]:
+                        enemy_left, enemy_top = int(enemy_xs[k]), int(enemy_ys[k])
+                        if (
+                            left < enemy_left + enemy_width
+                            and enemy_left < left + width
+                            and top < enemy_top + enemy_height
+                            and enemy_top < top + height
+                        ):
+                            alive[k] = 0
+                            enemies_left[i] -= 1
+
+            # ProjectileSystem.update
+            live = projectile_base
+            for p in range(projectile_base, projectile_base + projectiles[i]):
+                projectile_xs[p] += directions[p]
+                timers[p] += 1
+                projectile_x, projectile_y = projectile_xs[p], projectile_ys[p]
+
+                if check_solid_tile((projectile_x, projectile_y)):
+                    continue
+                if (
+                    dashing < 50
+                    and left <= int(projectile_x) < left + width
+                    and top <= int(projectile_y) < top + height
+                ):
+                    dead = True
+                    continue
+                if timers[p] > PROJECTILE_LIFETIME:
+                    continue
+
+                if live != p:
+                    projectile_xs[live], projectile_ys[live] = (
+                        projectile_x,
+                        projectile_y,
+                    )
+                    directions[live], timers[live] = directions[p], timers[p]
+                live += 1
+            projectiles[i] = live - projectile_base
+
+            if enemies_left[i] == 0:
+                dones[i] = CLEARED
+            elif dead:
+                dones[i] = DEAD
+            elif self._steps[i] >= self.max_steps:
+                dones[i] = TIMEOUT
+            else:
+                dones[i] = RUNNING
+                continue
+            self._reset(i)
+
+        return self.observation, dones
@@ -1,52 +1,112 @@
+from __future__ import annotations
+
 import random
 
 import pygame
 from pygame import Vector2 as Vec2
 
+CLOUD_BANDS = 4
+MIN_DEPTH = 0.2
+DEPTH_RANGE = 0.6
+
+
+class _CloudBand:
+    """Clouds of similar depth baked into one strip that wraps both ways."""
+
+    __slots__ = ("strip", "depth", "speed", "drift")
+
+    def __init__(self, strip: pygame.Surface, depth: float, speed: float) -> None:
+        self.strip = strip
+        self.depth = depth
+        self.speed = speed
+        self.drift = 0.0
+
+
+class Clouds:
+    """Parallax clouds, grouped by depth into a few pre-rendered bands.
+
+    Every cloud of a band shares the band's mean depth and speed, so a band
+    scrolls as one wrapping strip and costs at most 4 blits per frame
+    however many clouds it holds.
+    """
 
-class _Cloud:
     def __init__(
-        self, position: Vec2, speed: float, image: pygame.Surface, depth: float
+        self,
+        cloud_images: list[pygame.Surface],
+        count: int = 16,
+        rng: random.Random | None = None,
+        display_size: tuple[int, int] = (320, 240),
+        bands: int = CLOUD_BANDS,
     ) -> None:
-        self._position = position
-        self._speed = speed
-        self._image = image
-        self._depth = depth
+        rng = rng if rng is not None else random.Random()
+        clouds = []
 
-    def update(self) -> None:
-        self._position.x += self._speed * self._depth
+        for _ in range(count):
+            pos = Vec2(rng.random() * 999, rng.random() * 999)
+            speed = rng.random() * 0.05 + 0.1
+            img = rng.choice(cloud_images)
+            depth = rng.random() * 0.6 + 0.2
+
+            clouds.append((depth, speed, pos, img))
+
+        clouds.sort(key=lambda cloud: cloud[0])
 
-    def render(self, display: pygame.Surface, offset: Vec2) -> None:
-        render_position = self._position - offset * self._depth
-        x = (
-            render_position.x % (display.get_width() + self._image.get_width())
-            - self._image.get_width()
+        # a cloud wraps around once it is fully off the display
+        self._margin = (
+            max(img.get_width() for img in cloud_images),
+            max(img.get_height() for img in cloud_images),
         )
-        y = (
-            render_position.y % (display.get_height() + self._image.get_height())
-            - self._image.get_height()
+        self._display_size = display_size
+        self._period = (
+            display_size[0] + self._margin[0],
+            display_size[1] + self._margin[1],
         )
-        display.blit(self._image, (x, y))
 
+        members = [[] for _ in range(bands)]
+        for cloud in clouds:
+            band = int((cloud[0] - MIN_DEPTH) / DEPTH_RANGE * bands)
+            members[min(max(band, 0), bands - 1)].append(cloud)
 
-class Clouds:
-    def __init__(self, cloud_images, count=16) -> None:
-        self._clouds: list[_Cloud] = []
+        self._bands = [self._bake(band) for band in members if band]
 
-        for _ in range(count):
-            pos = Vec2(random.random() * 999, random.random() * 999)
-            speed = random.random() * 0.05 + 0.1
-            img = random.choice(cloud_images)
-            depth = random.random() * 0.6 + 0.2
+    def _bake(self, clouds: list[tuple]) -> _CloudBand:
+        period_x, period_y = self._period
+        strip = pygame.Surface(self._period)
+        blits = []
 
-            self._clouds.append(_Cloud(pos, speed, img, depth))
+        for _, _, pos, img in clouds:
+            x, y = pos.x % period_x, pos.y % period_y
+            # copies shifted by a period draw the part that wraps around
+            for wrap_x in (x, x - period_x):
+                for wrap_y in (y, y - period_y):
+                    blits.append((img, (wrap_x, wrap_y)))
 
-        self._clouds.sort(key=lambda x: x._depth)
+        strip.blits(blits, doreturn=False)
+        strip.set_colorkey((0, 0, 0), pygame.RLEACCEL)
+
+        depth = sum(cloud[0] for cloud in clouds) / len(clouds)
+        speed = sum(cloud[1] for cloud in clouds) / len(clouds)
+        return _CloudBand(strip, depth, speed)
 
     def update(self) -> None:
-        for cloud in self._clouds:
-            cloud.update()
+        for band in self._bands:
+            band.drift += band.speed * band.depth
+
+    def render(self, display: pygame.Surface, offset: Vec2 = Vec2(0, 0)) -> int:
+        period_x, period_y = self._period
+        width, height = self._display_size
+        blits = []
+
+        for band in self._bands:
+            x = (band.drift - offset[0] * band.depth - self._margin[0]) % period_x
+            y = (-offset[1] * band.depth - self._margin[1]) % period_y
+
+            for strip_x in (x, x - period_x):
+                if strip_x >= width:
+                    continue
+                for strip_y in (y, y - period_y):
+                    if strip_y < height:
+                        blits.append((band.strip, (strip_x, strip_y)))
 
-    def render(self, display: pygame.Surface, offset: Vec2 = Vec2(0, 0)):
-        for cloud in self._clouds:
-            cloud.render(display, offset)
+        display.blits(blits, doreturn=False)
+        return len(blits)
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import pygame
+
+TRANSITION_STEPS = 30
+TRANSITION_RADIUS_STEP = 8
+
+_HOLE_COLOR = (255, 255, 255)
+
+
+class EffectCache:
+    """Surfaces for screen effects, created once and reused every frame.
+
+    `allocations` counts the surfaces created so far, it stops growing once
+    every effect has been shown, so a steady state frame allocates nothing.
+    """
+
+    def __init__(self) -> None:
+        self._scratch: dict[tuple, pygame.Surface] = {}
+        self._transition_masks: dict[tuple, pygame.Surface] = {}
+        self._faded: dict[tuple[pygame.Surface, int], pygame.Surface] = {}
+        self.allocations = 0
+
+    def scratch(
+        self, name: str, size: tuple[int, int], flags: int = 0
+    ) -> pygame.Surface:
+        """Surface reused by every caller with the same name, size and flags."""
+        key = name, size, flags
+        if key not in self._scratch:
+            self._scratch[key] = pygame.Surface(size, flags)
+            self.allocations += 1
+        return self._scratch[key]
+
+    def transition_mask(self, size: tuple[int, int], step: int) -> pygame.Surface:
+        """Black screen with a hole that shrinks as `step` goes to 30
+
+        Args:
+            size (tuple[int, int]): size of the display
+            step (int): distance from the fully open transition, 1 to 30
+
+        Returns:
+            pygame.Surface: mask to blit over the display
+        """
+        key = size, step
+        if key not in self._transition_masks:
+            # 8 bit, so the 30 masks of a 320x240 display take ~2.3 MB
+            mask = pygame.Surface(size, 0, 8)
+            mask.set_palette([(0, 0, 0), _HOLE_COLOR])
+            pygame.draw.circle(
+                mask,
+                _HOLE_COLOR,
+                (size[0] / 2, size[1] / 2),
+                max(TRANSITION_STEPS - step, 0) * TRANSITION_RADIUS_STEP,
+            )
+            mask.set_colorkey(_HOLE_COLOR, pygame.RLEACCEL)
+            self._transition_masks[key] = mask
+            self.allocations += 1
+        return self._transition_masks[key]
+
+    def faded(self, img: pygame.Surface, alpha: int) -> pygame.Surface:
+        """Shared copy of `img` drawn with the given alpha."""
+        key = img, alpha
+        if key not in self._faded:
+            faded = img.copy()
+            faded.set_alpha(alpha)
+            self._faded[key] = faded
+            self.allocations += 1
+        return self._faded[key]
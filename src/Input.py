@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+from typing import Callable, NamedTuple
+
+
+class InputFrame(NamedTuple):
+    """Player input applied at the start of one simulation tick."""
+
+    left: bool = False
+    right: bool = False
+    jump: bool = False
+    dash: bool = False
+
+
+# maps a tick number to the input for that tick
+InputScript = Callable[[int], InputFrame]
+
+# bits of an input frame packed into one int, as stored in replays
+INPUT_LEFT = 1
+INPUT_RIGHT = 2
+INPUT_JUMP = 4
+INPUT_DASH = 8
+
+
+def encode_input(input_frame: InputFrame) -> int:
+    return (
+        INPUT_LEFT * input_frame.left
+        | INPUT_RIGHT * input_frame.right
+        | INPUT_JUMP * input_frame.jump
+        | INPUT_DASH * input_frame.dash
+    )
+
+
+def decode_input(bits: int) -> InputFrame:
+    return InputFrame(
+        bool(bits & INPUT_LEFT),
+        bool(bits & INPUT_RIGHT),
+        bool(bits & INPUT_JUMP),
+        bool(bits & INPUT_DASH),
+    )
+
+
+def patrol_script(tick: int) -> InputFrame:
+    """Run back and forth, jumping and dashing at fixed intervals."""
+    right = (tick // 240) % 2 == 0
+    return InputFrame(
+        left=not right,
+        right=right,
+        jump=tick % 45 == 0,
+        dash=tick % 120 == 60,
+    )
@@ -0,0 +1,187 @@
+from __future__ import annotations
+
+import json
+import mmap
+import struct
+import sys
+from array import array
+from typing import Any
+
+MAP_MAGIC = b"PGMP"
+MAP_VERSION = 1
+BINARY_MAP_EXTENSION = ".map"
+JSON_MAP_EXTENSION = ".json"
+
+# magic, version, flags, tile size, grid tiles, off-grid tiles and type
+# names length
+_HEADER = struct.Struct("<4sBBHIII4x")
+# off-grid positions are stored as int32 instead of float64
+_INT_OFFGRID = 1
+# a uint8 per off-grid tile follows its variants, _X_IS_INT | _Y_IS_INT
+_INT_OFFGRID_MARKS = 2
+_X_IS_INT = 1
+_Y_IS_INT = 2
+
+Tile = dict[str, Any]
+
+
+def read_map(path: str) -> tuple[int, list[Tile], list[Tile]]:
+    """Read a map in the format given by the extension of `path`
+
+    Args:
+        path (str): .json or .map file
+
+    Returns:
+        tuple[int, list[Tile], list[Tile]]: tile size, grid tiles and
+            off-grid tiles, each tile a {"type", "variant", "pos"} dict
+    """
+    if path.endswith(BINARY_MAP_EXTENSION):
+        return _read_binary_map(path)
+
+    with open(path, "r") as f:
+        data = json.load(f)
+
+    return data["tile_size"], list(data["tilemap"].values()), data["offgrid"]
+
+
+def write_map(
+    path: str, tile_size: int, tiles: list[Tile], offgrid: list[Tile]
+) -> None:
+    """Write a map in the format given by the extension of `path`"""
+    if path.endswith(BINARY_MAP_EXTENSION):
+        _write_binary_map(path, tile_size, tiles, offgrid)
+        return
+
+    tilemap = {}
+    for tile in tiles:
+        x, y = tile["pos"]
+        tilemap[f"{x};{y}"] = tile
+
+    with open(path, "w") as f:
+        json.dump({"tile_size": tile_size, "tilemap": tilemap, "offgrid": offgrid}, f)
+
+
+# The binary format is the header followed by packed little endian arrays,
+# widest first so every array is aligned: grid x and y (int32), off-grid x
+# and y (float64), grid type ids and variants, off-grid type ids and variants
+# (uint8), then the type names the ids index, joined by newlines.
+#
+# So that off-grid positions read back as the ints or floats they were
+# written as, they are stored as int32 when all of them are ints, and when
+# only some are, a mark per tile after the off-grid variants tells which.
+
+
+def _write_binary_map(
+    path: str, tile_size: int, tiles: list[Tile], offgrid: list[Tile]
+) -> None:
+    types = sorted(
+        {tile["type"] for tile in tiles} | {tile["type"] for tile in offgrid}
+    )
+    if len(types) > 256:
+        raise ValueError(f"binary maps support up to 256 tile types, got {len(types)}")
+    type_ids = {name: i for i, name in enumerate(types)}
+    names = "\n".join(types).encode()
+    marks = array(
+        "B",
+        [
+            _X_IS_INT * (type(tile["pos"][0]) is int)
+            | _Y_IS_INT * (type(tile["pos"][1]) is int)
+            for tile in offgrid
+        ],
+    )
+    flags = 0
+    if all(mark == _X_IS_INT | _Y_IS_INT for mark in marks) and all(
+        -(2**31) <= value < 2**31 for tile in offgrid for value in tile["pos"]
+    ):
+        flags |= _INT_OFFGRID
+    elif any(marks):
+        flags |= _INT_OFFGRID_MARKS
+    offgrid_fmt = "i" if flags & _INT_OFFGRID else "d"
+
+    arrays = [
+        array("i", [tile["pos"][0] for tile in tiles]),
+        array("i", [tile["pos"][1] for tile in tiles]),
+        array(offgrid_fmt, [tile["pos"][0] for tile in offgrid]),
+        array(offgrid_fmt, [tile["pos"][1] for tile in offgrid]),
+        array("B", [type_ids[tile["type"]] for tile in tiles]),
+        array("B", [tile["variant"] for tile in tiles]),
+        array("B", [type_ids[tile["type"]] for tile in offgrid]),
+        array("B", [tile["variant"] for tile in offgrid]),
+    ]
+    if flags & _INT_OFFGRID_MARKS:
+        arrays.append(marks)
+
+    with open(path, "wb") as f:
+        f.write(
+            _HEADER.pack(
+                MAP_MAGIC,
+                MAP_VERSION,
+                flags,
+                tile_size,
+                len(tiles),
+                len(offgrid),
+                len(names),
+            )
+        )
+        for values in arrays:
+            if sys.byteorder == "big":
+                values.byteswap()
+            f.write(values.tobytes())
+        f.write(names)
+
+
+def _read_binary_map(path: str) -> tuple[int, list[Tile], list[Tile]]:
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+        with memoryview(m) as view:
+            magic, version, flags, tile_size, count, offgrid_count, names_length = (
+                _HEADER.unpack_from(view)
+            )
+            if magic != MAP_MAGIC or version != MAP_VERSION:
+                raise ValueError(f"{path} is not a version {MAP_VERSION} binary map")
+
+            offset = _HEADER.size
+            xs, offset = _unpack(view, offset, "i", count)
+            ys, offset = _unpack(view, offset, "i", count)
+            offgrid_fmt = "i" if flags & _INT_OFFGRID else "d"
+            offgrid_xs, offset = _unpack(view, offset, offgrid_fmt, offgrid_count)
+            offgrid_ys, offset = _unpack(view, offset, offgrid_fmt, offgrid_count)
+            type_ids, offset = _unpack(view, offset, "B", count)
+            variants, offset = _unpack(view, offset, "B", count)
+            offgrid_type_ids, offset = _unpack(view, offset, "B", offgrid_count)
+            offgrid_variants, offset = _unpack(view, offset, "B", offgrid_count)
+            if flags & _INT_OFFGRID_MARKS:
+                marks, offset = _unpack(view, offset, "B", offgrid_count)
+            else:
+                marks = None
+            types = bytes(view[offset : offset + names_length]).decode().split("\n")
+
+    tiles = [
+        {"type": types[type_id], "variant": variant, "pos": (x, y)}
+        for type_id, variant, x, y in zip(type_ids, variants, xs, ys)
+    ]
+    offgrid = [
+        {"type": types[type_id], "variant": variant, "pos": (x, y)}
+        for type_id, variant, x, y in zip(
+            offgrid_type_ids, offgrid_variants, offgrid_xs, offgrid_ys
+        )
+    ]
+    if marks is not None:
+        for tile, mark in zip(offgrid, marks):
+            x, y = tile["pos"]
+            tile["pos"] = (
+                int(x) if mark & _X_IS_INT else x,
+                int(y) if mark & _Y_IS_INT else y,
+            )
+    return tile_size, tiles, offgrid
+
+
+def _unpack(view: memoryview, offset: int, fmt: str, count: int) -> tuple[list, int]:
+    """Read `count` packed values of struct format `fmt` without copying first"""
+    end = offset + count * struct.calcsize(fmt)
+
+    with view[offset:end] as raw, raw.cast(fmt) as values:
+        if sys.byteorder == "big" and fmt != "B":
+            swapped = array(fmt, values)
+            swapped.byteswap()
+            return swapped.tolist(), end
+        return values.tolist(), end
@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import pygame
+from pygame import Vector2 as Vec2
+
+from src.Effects import EffectCache
+
+if TYPE_CHECKING:
+    from src.Tilemap import Tilemap
+
+OUTLINE_COLOR = (0, 0, 0, 180)
+OUTLINE_OFFSETS = [(-1, 0), (0, -1), (1, 0), (0, 1)]
+OUTLINE_MODES = ("cached", "full")
+
+
+def bake_outline(surface: pygame.Surface) -> pygame.Surface:
+    """Bake the 1px outline of the opaque pixels of a surface
+
+    Args:
+        surface (pygame.Surface): surface with colorkey or per pixel alpha
+
+    Returns:
+        pygame.Surface: outline padded by 1px on every side, to be blitted
+            1px up and left of the surface position
+    """
+    silhouette = pygame.mask.from_surface(surface).to_surface(
+        setcolor=OUTLINE_COLOR, unsetcolor=(0, 0, 0, 0)
+    )
+    width, height = surface.get_size()
+    outline = pygame.Surface((width + 2, height + 2), pygame.SRCALPHA)
+
+    for offset_x, offset_y in OUTLINE_OFFSETS:
+        outline.blit(silhouette, (1 + offset_x, 1 + offset_y))
+
+    return outline
+
+
+class OutlineRenderer:
+    """Draws the dark outline behind everything on the display.
+
+    In "cached" mode outlines are baked once per tilemap chunk and per
+    sprite image, and each frame only blits the outlines of the sprites
+    queued with `add`. "full" mode rebuilds a mask of the whole display
+    every frame, as the game originally did.
+    """
+
+    def __init__(
+        self, mode: str = "cached", effects: EffectCache | None = None
+    ) -> None:
+        if mode not in OUTLINE_MODES:
+            raise ValueError(f"unknown outline mode: {mode}")
+
+        self.mode = mode
+        self._effects = effects if effects is not None else EffectCache()
+        self._outlines: dict[pygame.Surface, pygame.Surface] = {}
+        self._queue: list[tuple[pygame.Surface, tuple[float, float]]] = []
+        self._polygons: list[tuple] = []
+
+    def outline(self, img: pygame.Surface) -> pygame.Surface:
+        if img not in self._outlines:
+            self._outlines[img] = bake_outline(img)
+        return self._outlines[img]
+
+    def add(self, img: pygame.Surface, position: tuple[float, float]) -> None:
+        if self.mode == "cached":
+            self._queue.append((self.outline(img), (position[0] - 1, position[1] - 1)))
+
+    def add_polygons(self, polygons: list[tuple]) -> None:
+        if self.mode == "cached":
+            self._polygons.extend(polygons)
+
+    def render(
+        self,
+        display: pygame.Surface,
+        dest: pygame.Surface,
+        tilemap: Tilemap,
+        offset: Vec2 = Vec2(0, 0),
+    ) -> int:
+        """Draw the outlines onto `dest` and return the number of blits."""
+        if self.mode == "full":
+            silhouette = pygame.mask.from_surface(display).to_surface(
+                self._effects.scratch(
+                    "outline/silhouette", display.get_size(), pygame.SRCALPHA
+                ),
+                setcolor=OUTLINE_COLOR,
+                unsetcolor=(0, 0, 0, 0),
+            )
+            for outline_offset in OUTLINE_OFFSETS:
+                dest.blit(silhouette, outline_offset)
+            return len(OUTLINE_OFFSETS)
+
+        blits = tilemap.render_outline(dest, offset) + len(self._queue)
+        dest.blits(self._queue, doreturn=False)
+        self._queue.clear()
+
+        if self._polygons:
+            self._render_polygons(dest)
+            self._polygons.clear()
+            blits += 1
+
+        return blits
+
+    def _render_polygons(self, dest: pygame.Surface) -> None:
+        scratch = self._effects.scratch(
+            "outline/polygons", dest.get_size(), pygame.SRCALPHA
+        )
+        scratch.fill((0, 0, 0, 0))
+        for points in self._polygons:
+            for offset_x, offset_y in OUTLINE_OFFSETS:
+                pygame.draw.polygon(
+                    scratch,
+                    OUTLINE_COLOR,
+                    [(x + offset_x, y + offset_y) for x, y in points],
+                )
+        dest.blit(scratch, (0, 0))
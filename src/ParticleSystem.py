@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import math
+
+import pygame
+from pygame import Vector2 as Vec2
+
+from src.Animation import Animation
+
+SWAY_TYPES = {"leaf"}
+
+
+class ParticleSystem:
+    """Pool of particles stored as parallel lists instead of objects.
+
+    Live particles occupy the first `len(self)` slots, an expired particle
+    is replaced by the last live one so removal is O(1). Spawning into a
+    full pool is ignored.
+    """
+
+    def __init__(self, assets: dict, capacity: int = 2048) -> None:
+        self._assets = assets
+        self._capacity = capacity
+        self._count = 0
+
+        self._x = [0.0] * capacity
+        self._y = [0.0] * capacity
+        self._vx = [0.0] * capacity
+        self._vy = [0.0] * capacity
+        self._frame = [0] * capacity
+        self._type = [0] * capacity
+
+        # per particle type tables, indexed by the values stored in self._type
+        self._type_ids: dict[str, int] = {}
+        self._frame_tables: list[list[pygame.Surface]] = []
+        self._lengths: list[int] = []
+        self._loops: list[bool] = []
+        self._sways: list[bool] = []
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _type_id(self, type: str) -> int:
+        if type not in self._type_ids:
+            animation: Animation = self._assets["particle/" + type]
+            self._type_ids[type] = len(self._frame_tables)
+            self._frame_tables.append(animation.frames)
+            self._lengths.append(animation.length)
+            self._loops.append(animation.loop)
+            self._sways.append(type in SWAY_TYPES)
+        return self._type_ids[type]
+
+    def spawn(
+        self,
+        type: str,
+        position: Vec2,
+        velocity: Vec2 = Vec2(0, 0),
+        frame: int = 0,
+    ) -> None:
+        if self._count == self._capacity:
+            return
+
+        i = self._count
+        self._x[i], self._y[i] = position
+        self._vx[i], self._vy[i] = velocity
+        self._frame[i] = frame
+        self._type[i] = self._type_id(type)
+        self._count += 1
+
+    def clear(self) -> None:
+        self._count = 0
+
+    def state(self) -> tuple:
+        """Positions, velocities and frames of the live particles."""
+        n = self._count
+        return (self._x[:n], self._y[:n], self._vx[:n], self._vy[:n], self._frame[:n])
+
+    def update(self) -> None:
+        x, y, vx, vy = self._x, self._y, self._vx, self._vy
+        frames, types = self._frame, self._type
+        lengths, loops, sways = self._lengths, self._loops, self._sways
+
+        i = 0
+        while i < self._count:
+            type = types[i]
+            frame = frames[i]
+
+            if sways[type]:
+                x[i] += math.sin(frame * 0.035) * 0.3
+            x[i] += vx[i]
+            y[i] += vy[i]
+
+            if loops[type]:
+                frames[i] = (frame + 1) % lengths[type]
+            elif frame + 1 < lengths[type] - 1:
+                frames[i] = frame + 1
+            else:
+                last = self._count - 1
+                x[i], y[i], vx[i], vy[i] = x[last], y[last], vx[last], vy[last]
+                frames[i], types[i] = frames[last], types[last]
+                self._count = last
+                continue
+
+            i += 1
+
+    def render(self, display: pygame.Surface, offset: Vec2 = Vec2(0, 0)) -> None:
+        tables = self._frame_tables
+        offset_x, offset_y = offset
+        blits = []
+
+        for i in range(self._count):
+            img = tables[self._type[i]][self._frame[i]]
+            blits.append(
+                (
+                    img,
+                    (
+                        self._x[i] - offset_x - img.get_width() // 2,
+                        self._y[i] - offset_y - img.get_height() // 2,
+                    ),
+                )
+            )
+
+        display.blits(blits, doreturn=False)
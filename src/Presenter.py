@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import pygame
+
+PRESENT_MODES = ("full", "dirty")
+
+
+class Presenter:
+    """Upscales the low resolution display onto the window.
+
+    Scales into preallocated surfaces instead of allocating a window sized
+    surface every frame, straight into the window when there is no offset.
+    In "dirty" mode `present` can be given the changed rects of the source
+    and only rescales and updates those; without rects it falls back to a
+    full present, as in "full" mode.
+    """
+
+    def __init__(
+        self,
+        screen: pygame.Surface,
+        source_size: tuple[int, int],
+        mode: str = "full",
+        headless: bool = False,
+    ) -> None:
+        if mode not in PRESENT_MODES:
+            raise ValueError(f"unknown present mode: {mode}")
+
+        self.mode = mode
+        self._screen = screen
+        self._size = screen.get_size()
+        self._source_rect = pygame.Rect((0, 0), source_size)
+        self._scale_x = self._size[0] / source_size[0]
+        self._scale_y = self._size[1] / source_size[1]
+        self._headless = headless
+        # holds the scaled frame when it is drawn to the window with an offset
+        self._scaled = pygame.Surface(self._size, 0, screen)
+        self._dirty: list[pygame.Rect] | None = None
+
+    def present(
+        self,
+        source: pygame.Surface,
+        offset: tuple[float, float] = (0, 0),
+        dirty: list[pygame.Rect] | None = None,
+    ) -> None:
+        """Scale `source` onto the window, `dirty` rects in source pixels."""
+        if self.mode == "dirty" and dirty is not None and offset == (0, 0):
+            self._present_dirty(source, dirty)
+            return
+
+        self._dirty = None
+        if offset == (0, 0):
+            pygame.transform.scale(source, self._size, self._screen)
+        else:
+            pygame.transform.scale(source, self._size, self._scaled)
+            self._screen.blit(self._scaled, offset)
+
+    def _present_dirty(self, source: pygame.Surface, dirty: list[pygame.Rect]) -> None:
+        self._dirty = []
+
+        for rect in dirty:
+            rect = rect.clip(self._source_rect)
+            if not rect:
+                continue
+
+            scaled = pygame.Rect(
+                rect.x * self._scale_x,
+                rect.y * self._scale_y,
+                rect.width * self._scale_x,
+                rect.height * self._scale_y,
+            )
+            pygame.transform.scale(
+                source.subsurface(rect),
+                scaled.size,
+                self._screen.subsurface(scaled),
+            )
+            self._dirty.append(scaled)
+
+    def update(self) -> None:
+        """Show what the last `present` drew, only its rects when dirty."""
+        if self._headless:
+            return
+        if self._dirty is None:
+            pygame.display.update()
+        elif self._dirty:
+            pygame.display.update(self._dirty)
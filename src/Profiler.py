@@ -0,0 +1,215 @@
+from __future__ import annotations
+
+import json
+import time
+from collections import deque
+
+import pygame
+
+OVERLAY_REFRESH_FRAMES = 15
+
+
+class _NullScope:
+    def __enter__(self) -> None:
+        pass
+
+    def __exit__(self, *exc_info) -> None:
+        pass
+
+
+_NULL_SCOPE = _NullScope()
+
+
+class _Scope:
+    __slots__ = ("_profiler", "_name", "_start")
+
+    def __init__(self, profiler: Profiler, name: str) -> None:
+        self._profiler = profiler
+        self._name = name
+        self._start = 0.0
+
+    def __enter__(self) -> None:
+        self._start = time.perf_counter()
+
+    def __exit__(self, *exc_info) -> None:
+        end = time.perf_counter()
+        self._profiler.add_time(self._name, end - self._start, self._start)
+
+
+class Profiler:
+    """Times named scopes and tracks counters frame by frame.
+
+    Keeps totals since the last reset plus a rolling window of per-frame
+    values for averages and percentiles, can draw them as an overlay and
+    record every scope as a Chrome trace event (chrome://tracing, Perfetto).
+    While disabled `scope` returns a shared no-op context manager, so
+    instrumented code costs one method call per scope.
+    """
+
+    def __init__(
+        self, enabled: bool = False, window: int = 120, trace: bool = False
+    ) -> None:
+        self.enabled = enabled or trace
+        self.overlay = False
+        self._window = window
+        self._scopes: dict[str, _Scope] = {}
+
+        self._totals: dict[str, float] = {}
+        self._frames = 0
+        self._frame_start = time.perf_counter()
+        self._frame_times: dict[str, float] = {}
+        self._frame_counters: dict[str, int] = {}
+        self._history: dict[str, deque[float]] = {}
+        self._counter_history: dict[str, deque[int]] = {}
+
+        self._trace: list[dict] | None = [] if trace else None
+        self._epoch = time.perf_counter()
+
+        self._font: pygame.font.Font | None = None
+        self._overlay_lines: list[pygame.Surface] = []
+
+    def scope(self, name: str) -> _Scope | _NullScope:
+        if not self.enabled:
+            return _NULL_SCOPE
+        if name not in self._scopes:
+            self._scopes[name] = _Scope(self, name)
+        return self._scopes[name]
+
+    def add_time(self, name: str, seconds: float, start: float | None = None) -> None:
+        self._totals[name] = self._totals.get(name, 0.0) + seconds
+        self._frame_times[name] = self._frame_times.get(name, 0.0) + seconds
+
+        if self._trace is not None and start is not None:
+            self._trace.append(
+                {
+                    "name": name,
+                    "ph": "X",
+                    "ts": (start - self._epoch) * 1e6,
+                    "dur": seconds * 1e6,
+                    "pid": 0,
+                    "tid": 0,
+                }
+            )
+
+    def count(self, name: str, value: int) -> None:
+        self._frame_counters[name] = self._frame_counters.get(name, 0) + value
+
+    def end_frame(self) -> None:
+        if not self.enabled:
+            return
+
+        now = time.perf_counter()
+        self.add_time("frame", now - self._frame_start, self._frame_start)
+        self._frame_start = now
+        self._frames += 1
+
+        for name, seconds in self._frame_times.items():
+            self._sample(self._history, name, seconds)
+        for name, value in self._frame_counters.items():
+            self._sample(self._counter_history, name, value)
+
+        if self._trace is not None and self._frame_counters:
+            self._trace.append(
+                {
+                    "name": "counters",
+                    "ph": "C",
+                    "ts": (now - self._epoch) * 1e6,
+                    "args": dict(self._frame_counters),
+                    "pid": 0,
+                    "tid": 0,
+                }
+            )
+
+        self._frame_times.clear()
+        self._frame_counters.clear()
+
+        if self.overlay and self._frames % OVERLAY_REFRESH_FRAMES == 1:
+            self._overlay_lines = []
+
+    def _sample(self, history: dict[str, deque], name: str, value: float) -> None:
+        if name not in history:
+            history[name] = deque(maxlen=self._window)
+        history[name].append(value)
+
+    def reset(self) -> None:
+        self._totals.clear()
+        self._frames = 0
+        self._history.clear()
+        self._counter_history.clear()
+        self._frame_start = time.perf_counter()
+
+    def stats(self, name: str) -> dict[str, float]:
+        """Mean, median, 95th percentile and max of the rolling window in ms."""
+        samples = sorted(self._history.get(name, ()))
+        if not samples:
+            return {"mean_ms": 0.0, "p50_ms": 0.0, "p95_ms": 0.0, "max_ms": 0.0}
+
+        return {
+            "mean_ms": sum(samples) * 1000 / len(samples),
+            "p50_ms": samples[len(samples) // 2] * 1000,
+            "p95_ms": samples[min(len(samples) * 95 // 100, len(samples) - 1)] * 1000,
+            "max_ms": samples[-1] * 1000,
+        }
+
+    def counter(self, name: str) -> float:
+        """Mean of a counter over the rolling window."""
+        samples = self._counter_history.get(name, ())
+        return sum(samples) / len(samples) if samples else 0.0
+
+    def report(self) -> dict[str, dict[str, float]]:
+        frames = max(self._frames, 1)
+        report = {
+            name: {
+                "total_ms": total * 1000,
+                "mean_ms": total * 1000 / frames,
+                **{
+                    key: value
+                    for key, value in self.stats(name).items()
+                    if key != "mean_ms"
+                },
+            }
+            for name, total in self._totals.items()
+        }
+        report["counters"] = {
+            name: self.counter(name) for name in self._counter_history
+        }
+        return report
+
+    def dump_trace(self, path: str) -> None:
+        with open(path, "w") as f:
+            json.dump({"traceEvents": self._trace or []}, f)
+
+    def render_overlay(self, display: pygame.Surface) -> None:
+        if not self.overlay:
+            return
+
+        if not self._overlay_lines:
+            if self._font is None:
+                self._font = pygame.font.Font(None, 12)
+
+            frame = self.stats("frame")
+            lines = [
+                f"frame {frame['mean_ms']:5.2f} ms  p95 {frame['p95_ms']:5.2f}",
+            ]
+            for name in sorted(self._history):
+                if name != "frame":
+                    stats = self.stats(name)
+                    lines.append(
+                        f"{name:20} {stats['mean_ms']:5.2f}  {stats['p95_ms']:5.2f}"
+                    )
+            for name in sorted(self._counter_history):
+                lines.append(f"{name:20} {self.counter(name):6.0f}")
+
+            self._overlay_lines = [
+                self._font.render(line, False, (255, 255, 255), (0, 0, 0))
+                for line in lines
+            ]
+
+        y = 2
+        for line in self._overlay_lines:
+            display.blit(line, (2, y))
+            y += line.get_height()
+
+    @property
+    def frames(self) -> int:
+        return self._frames
@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+from typing import NamedTuple
+
+import pygame
+from pygame import Vector2 as Vec2
+
+from src.Outline import OutlineRenderer
+from src.Tilemap import Tilemap
+
+PROJECTILE_LIFETIME = 360
+
+
+class ProjectileHit(NamedTuple):
+    kind: str  # "wall" or "player"
+    position: tuple[float, float]
+    direction: float
+
+
+class ProjectileSystem:
+    """Horizontal projectiles stored as parallel lists instead of objects.
+
+    Every update advances all projectiles, tests them against the tilemap and
+    the player and compacts the survivors in place, keeping spawn order.
+    Spawning into a full pool is ignored.
+    """
+
+    def __init__(self, capacity: int = 1024) -> None:
+        self._capacity = capacity
+        self._count = 0
+
+        self._x = [0.0] * capacity
+        self._y = [0.0] * capacity
+        self._direction = [0.0] * capacity
+        self._timer = [0] * capacity
+
+    def __len__(self) -> int:
+        return self._count
+
+    def spawn(self, position: Vec2, direction: float) -> None:
+        if self._count == self._capacity:
+            return
+
+        i = self._count
+        self._x[i], self._y[i] = position
+        self._direction[i] = direction
+        self._timer[i] = 0
+        self._count += 1
+
+    def clear(self) -> None:
+        self._count = 0
+
+    def state(self) -> tuple:
+        """Positions, directions and timers of the live projectiles."""
+        n = self._count
+        return (self._x[:n], self._y[:n], self._direction[:n], self._timer[:n])
+
+    def update(
+        self, tilemap: Tilemap, player_rect: pygame.Rect, player_hittable: bool = True
+    ) -> list[ProjectileHit]:
+        x, y, directions, timers = self._x, self._y, self._direction, self._timer
+        left, top, right, bottom = (
+            player_rect.left,
+            player_rect.top,
+            player_rect.right,
+            player_rect.bottom,
+        )
+        hits = []
+        alive = 0
+
+        for i in range(self._count):
+            x[i] += directions[i]
+            timers[i] += 1
+
+            if tilemap.check_solid_tile((x[i], y[i])):
+                hits.append(ProjectileHit("wall", (x[i], y[i]), directions[i]))
+                continue
+            if (
+                player_hittable
+                and left <= int(x[i]) < right
+                and top <= int(y[i]) < bottom
+            ):
+                hits.append(ProjectileHit("player", (x[i], y[i]), directions[i]))
+                continue
+            if timers[i] > PROJECTILE_LIFETIME:
+                continue
+
+            if alive != i:
+                x[alive], y[alive] = x[i], y[i]
+                directions[alive], timers[alive] = directions[i], timers[i]
+            alive += 1
+
+        self._count = alive
+        return hits
+
+    def render(
+        self,
+        display: pygame.Surface,
+        img: pygame.Surface,
+        offset: Vec2 = Vec2(0, 0),
+        outline: OutlineRenderer | None = None,
+    ) -> None:
+        offset_x = offset[0] + img.get_width() / 2
+        offset_y = offset[1] + img.get_height() / 2
+        positions = [
+            (self._x[i] - offset_x, self._y[i] - offset_y) for i in range(self._count)
+        ]
+
+        display.blits([(img, position) for position in positions], doreturn=False)
+        if outline is not None:
+            for position in positions:
+                outline.add(img, position)
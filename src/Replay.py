@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import hashlib
+import struct
+
+from src.Input import InputFrame, InputScript, decode_input, encode_input
+
+REPLAY_MAGIC = b"PGRP"
+# bumped whenever the simulation rules change, older replays would desync
+REPLAY_VERSION = 2
+CHECKPOINT_INTERVAL = 60
+
+# magic, version, seed, level, number of ticks, number of checkpoints
+_HEADER = struct.Struct("<4sBQHII")
+# tick, state hash
+_CHECKPOINT = struct.Struct("<IQ")
+
+
+class Replay:
+    """Inputs of a recorded run plus state hashes to verify it against.
+
+    Stored as a fixed header, one input bitmask byte per tick and the
+    (tick, hash) checkpoints, all little endian.
+    """
+
+    def __init__(self, seed: int, level: int = 0) -> None:
+        self.seed = seed
+        self.level = level
+        self.inputs = bytearray()
+        self.checkpoints: dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.inputs)
+
+    def record(self, input_frame: InputFrame) -> None:
+        self.inputs.append(encode_input(input_frame))
+
+    def input_script(self) -> InputScript:
+        inputs = self.inputs
+
+        def script(tick: int) -> InputFrame:
+            return decode_input(inputs[tick]) if tick < len(inputs) else InputFrame()
+
+        return script
+
+    def save(self, path: str) -> None:
+        with open(path, "wb") as f:
+            f.write(
+                _HEADER.pack(
+                    REPLAY_MAGIC,
+                    REPLAY_VERSION,
+                    self.seed,
+                    self.level,
+                    len(self.inputs),
+                    len(self.checkpoints),
+                )
+            )
+            f.write(self.inputs)
+            for tick in sorted(self.checkpoints):
+                f.write(_CHECKPOINT.pack(tick, self.checkpoints[tick]))
+
+    @classmethod
+    def load(cls, path: str) -> Replay:
+        with open(path, "rb") as f:
+            data = f.read()
+
+        magic, version, seed, level, ticks, checkpoints = _HEADER.unpack_from(data)
+        if magic != REPLAY_MAGIC or version != REPLAY_VERSION:
+            raise ValueError(f"{path} is not a version {REPLAY_VERSION} replay")
+
+        replay = cls(seed, level)
+        offset = _HEADER.size
+        replay.inputs = bytearray(data[offset : offset + ticks])
+        offset += ticks
+        for tick, state_hash in _CHECKPOINT.iter_unpack(
+            data[offset : offset + checkpoints * _CHECKPOINT.size]
+        ):
+            replay.checkpoints[tick] = state_hash
+
+        return replay
+
+
+def state_hash(state: tuple) -> int:
+    """64 bit hash of a tuple of simulation values, stable across runs."""
+    digest = hashlib.blake2b(repr(state).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
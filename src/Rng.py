@@ -0,0 +1,22 @@
+from __future__ import annotations
+
+import random
+
+RNG_STREAMS = ("enemies", "clouds", "leaves", "effects", "screenshake")
+
+
+class RngStreams:
+    """Independent seeded random generators, one per subsystem.
+
+    Each stream is seeded from the game seed and its own name, so drawing
+    more numbers in one subsystem (e.g. screenshake, which runs per rendered
+    frame rather than per tick) never shifts the numbers seen by another.
+    """
+
+    def __init__(self, seed: int) -> None:
+        self.seed = seed
+        self.enemies = random.Random(f"{seed}/enemies")
+        self.clouds = random.Random(f"{seed}/clouds")
+        self.leaves = random.Random(f"{seed}/leaves")
+        self.effects = random.Random(f"{seed}/effects")
+        self.screenshake = random.Random(f"{seed}/screenshake")
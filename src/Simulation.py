@@ -0,0 +1,277 @@
+from __future__ import annotations
+
+import math
+from typing import Callable
+
+import pygame
+from pygame import Vector2 as Vec2
+
+from src.AssetManager import AssetManager
+from src.entities.Enemy import Enemy
+from src.entities.Player import Player
+from src.Input import InputFrame
+from src.ParticleSystem import ParticleSystem
+from src.Profiler import Profiler
+from src.ProjectileSystem import ProjectileSystem
+from src.Rng import RngStreams
+from src.SparkSystem import SparkSystem
+from src.SpatialGrid import SpatialGrid
+from src.Tilemap import Tilemap
+
+# size of the area centered on the player where enemies update every tick,
+# and of the one outside of which they sleep
+ACTIVE_AREA = (640, 480)
+AWAKE_AREA = (1280, 960)
+# enemies between both areas update once every REDUCED_RATE ticks
+REDUCED_RATE = 4
+
+
+class Simulation:
+    """Game state and rules of one play session, without any rendering.
+
+    Advances one fixed tick per `step`, driven only by its input and its
+    seeded generators, so any number of simulations can run side by side,
+    e.g. one per process in simulate.py. Needs the assets for tile and
+    animation metadata but never opens a window or draws.
+
+    Enemies are indexed by their rects in `enemy_index`, updated as they
+    move, so player interactions only test the enemies nearby. Only the
+    enemies around the player, whom the camera follows, update every tick:
+    further ones update at a reduced rate and distant ones sleep, without
+    physics or animation, until the player comes closer. The last step's
+    numbers are kept in `active_enemies`, `reduced_enemies`,
+    `sleeping_enemies` and `resting_enemies` (updated ones standing still,
+    which skip collisions).
+
+    `deaths` and `levels_cleared` count outcomes since creation.
+    """
+
+    def __init__(
+        self,
+        assets: AssetManager,
+        num_of_maps: int,
+        rng: RngStreams,
+        profiler: Profiler | None = None,
+        on_load_level: Callable[[], None] | None = None,
+    ) -> None:
+        self.assets = assets
+        self.num_of_maps = num_of_maps
+        self.rng = rng
+        self.profiler = profiler if profiler is not None else Profiler()
+        self._on_load_level = on_load_level
+
+        self.tilemap = Tilemap(assets, tile_size=16)
+        self.particles = ParticleSystem(assets)
+        self.projectiles = ProjectileSystem()
+        self.sparks = SparkSystem()
+        self.enemies: list[Enemy] = []
+        self.enemy_index = SpatialGrid(cell_size=64)
+        self.leaf_spawners: list[pygame.Rect] = []
+        self.player = Player(
+            assets, self.particles, Vec2(0, 0), Vec2(8, 15), rng.effects
+        )
+        self.movement = [False, False]
+
+        self.tick = 0
+        self.level = 0
+        self.dead = 0
+        self.transition = 0
+        self.screenshake = 0
+        self.deaths = 0
+        self.levels_cleared = 0
+        self.active_enemies = 0
+        self.reduced_enemies = 0
+        self.sleeping_enemies = 0
+        self.resting_enemies = 0
+
+    def load_level(self, map_id: int) -> None:
+        self.particles.clear()
+        self.projectiles.clear()
+        self.sparks.clear()
+        self.enemies.clear()
+        self.enemy_index.clear()
+        self.leaf_spawners.clear()
+        self.dead = 0
+        self.transition = -30
+
+        # stays resident for respawns, the previous level's map is dropped
+        self.tilemap.load_data(*self.assets[f"map/{map_id}"])
+        self.assets.set_level([f"map/{map_id}"])
+
+        player_tile = next(self.tilemap.extract("spawners", 0))
+        self.player.set_position(Vec2(player_tile["pos"]))
+
+        for enemy in self.tilemap.extract("spawners", 1):
+            self.spawn_enemy(Vec2(enemy["pos"]))
+
+        for tree in self.tilemap.extract("large_decor", variant=2, keep=True):
+            x, y = tree["pos"]
+            self.leaf_spawners.append(pygame.Rect(x + 4, y + 4, 23, 13))
+
+        if self._on_load_level is not None:
+            self._on_load_level()
+
+    def spawn_enemy(self, position: Vec2) -> Enemy:
+        enemy = Enemy(
+            self.assets,
+            self.projectiles,
+            self.sparks,
+            self.player,
+            position,
+            Vec2(8, 15),
+            self.rng.enemies,
+        )
+        self.enemies.append(enemy)
+        self.enemy_index.insert(enemy, enemy.rect)
+        return enemy
+
+    def state(self) -> tuple:
+        return (
+            self.tick,
+            self.level,
+            self.dead,
+            self.transition,
+            self.player.state(),
+            tuple(enemy.state() for enemy in self.enemies),
+            self.projectiles.state(),
+            self.sparks.state(),
+            self.particles.state(),
+        )
+
+    def step(self, input_frame: InputFrame) -> None:
+        """Advance the simulation by one fixed tick."""
+        self._apply_input(input_frame)
+        self.tick += 1
+
+        self.screenshake = max(0, self.screenshake - 1)
+
+        if len(self.enemies) == 0:
+            self.transition += 1
+            if self.transition == 1:
+                # parse the next map while the transition plays
+                next_level = min(self.level + 1, self.num_of_maps - 1)
+                self.assets.prefetch([f"map/{next_level}"])
+            if self.transition > 30:
+                self.levels_cleared += 1
+                self.level = min(self.level + 1, self.num_of_maps - 1)
+                self.load_level(self.level)
+        if self.transition < 0:
+            self.transition += 1
+
+        if self.player.is_dead and self.dead == 0:
+            self.screenshake = max(16, self.screenshake)
+            self.dead += 1
+            self.deaths += 1
+
+        with self.profiler.scope("update/entities"):
+            if self.dead == 0:
+                player_movement = Vec2(self.movement[1] - self.movement[0], 0)
+                self.player.update(self.tilemap, player_movement)
+            elif self.dead > 0:
+                self.dead += 1
+                self.transition = min(30, self.transition + 1)
+                if self.dead > 40:
+                    self.load_level(self.level)
+
+            self._update_enemies()
+
+            if self.player.is_dashing:
+                hits = self.enemy_index.query_rect(self.player.rect)
+                # in spawn order, the set order would change the effects drawn
+                for enemy in sorted(hits, key=self.enemies.index):
+                    self.screenshake = max(20, self.screenshake)
+                    self.enemies.remove(enemy)
+                    self.enemy_index.remove(enemy)
+                    self._graphical_explosion(Vec2(enemy.rect.center))
+                    self.sparks.spawn(
+                        enemy.rect.center, 0, 5 + self.rng.effects.random()
+                    )
+                    self.sparks.spawn(
+                        enemy.rect.center, math.pi, 5 + self.rng.effects.random()
+                    )
+
+        with self.profiler.scope("update/particles"):
+            self.particles.update()
+
+        with self.profiler.scope("update/projectiles"):
+            hits = self.projectiles.update(
+                self.tilemap, self.player.rect, not self.player.is_dashing
+            )
+        for hit in hits:
+            if hit.kind == "wall":
+                rng = self.rng.effects
+                for _ in range(4):
+                    if hit.direction < 0:
+                        self.sparks.spawn(
+                            hit.position,
+                            rng.random() - 0.5,
+                            2 + rng.random(),
+                        )
+                    if hit.direction > 0:
+                        self.sparks.spawn(
+                            hit.position,
+                            rng.random() - 0.5 + math.pi,
+                            2 + rng.random(),
+                        )
+            elif hit.kind == "player":
+                self._graphical_explosion(Vec2(hit.position))
+                if self.dead == 0:
+                    self.deaths += 1
+                self.dead += 1
+                self.screenshake = max(16, self.screenshake)
+
+        with self.profiler.scope("update/sparks"):
+            self.sparks.update()
+
+        # spawn leafs
+        for spawner in self.leaf_spawners:
+            if self.rng.leaves.random() * 39999 < spawner.width * spawner.height:
+                x = spawner.x + self.rng.leaves.random() * spawner.width
+                y = spawner.y + self.rng.leaves.random() * spawner.height
+                self.particles.spawn("leaf", Vec2(x, y), Vec2(-0.1, 0.3))
+
+    def _update_enemies(self) -> None:
+        active_area = pygame.Rect((0, 0), ACTIVE_AREA)
+        awake_area = pygame.Rect((0, 0), AWAKE_AREA)
+        active_area.center = awake_area.center = self.player.rect.center
+        active = self.enemy_index.query_rect(active_area)
+        awake = self.enemy_index.query_rect(awake_area)
+        self.active_enemies = len(active)
+        self.reduced_enemies = len(awake) - len(active)
+        self.sleeping_enemies = len(self.enemies) - len(awake)
+        self.resting_enemies = 0
+
+        for i, enemy in enumerate(self.enemies):
+            if enemy in active or (
+                # staggered, so a few of them update every tick
+                enemy in awake
+                and (self.tick + i) % REDUCED_RATE == 0
+            ):
+                enemy.update(self.tilemap)
+                self.enemy_index.move(enemy, enemy.rect)
+                self.resting_enemies += enemy.is_resting
+
+    def _graphical_explosion(self, position: Vec2) -> None:
+        rng = self.rng.effects
+        for _ in range(30):
+            angle = rng.random() * math.pi * 2
+            self.sparks.spawn(position, angle, rng.random() + 2)
+
+            speed = rng.random() * 5
+            self.particles.spawn(
+                "particle",
+                position,
+                velocity=Vec2(
+                    math.cos(angle + math.pi) * speed * 0.5,
+                    math.sin(angle + math.pi) * speed * 0.5,
+                ),
+                frame=rng.randint(0, 3),
+            )
+
+    def _apply_input(self, input_frame: InputFrame) -> None:
+        self.movement[0] = input_frame.left
+        self.movement[1] = input_frame.right
+        if input_frame.jump:
+            self.player.jump()
+        if input_frame.dash:
+            self.player.dash()
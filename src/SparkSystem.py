@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import math
+
+import pygame
+from pygame import Vector2 as Vec2
+
+from src.Outline import OutlineRenderer
+
+
+class SparkSystem:
+    """Pool of sparks stored as parallel lists instead of objects.
+
+    Live sparks occupy the first `len(self)` slots, a spark that stopped is
+    replaced by the last live one so removal is O(1). Spawning into a full
+    pool is ignored.
+    """
+
+    def __init__(self, capacity: int = 1024) -> None:
+        self._capacity = capacity
+        self._count = 0
+
+        self._x = [0.0] * capacity
+        self._y = [0.0] * capacity
+        self._cos = [0.0] * capacity
+        self._sin = [0.0] * capacity
+        self._speed = [0.0] * capacity
+
+    def __len__(self) -> int:
+        return self._count
+
+    def spawn(self, position: Vec2, angle: float, speed: float) -> None:
+        if self._count == self._capacity:
+            return
+
+        i = self._count
+        self._x[i], self._y[i] = position
+        self._cos[i] = math.cos(angle)
+        self._sin[i] = math.sin(angle)
+        self._speed[i] = speed
+        self._count += 1
+
+    def clear(self) -> None:
+        self._count = 0
+
+    def state(self) -> tuple:
+        """Positions, angles and speeds of the live sparks."""
+        n = self._count
+        return (self._x[:n], self._y[:n], self._cos[:n], self._sin[:n], self._speed[:n])
+
+    def update(self) -> None:
+        x, y, cos, sin, speeds = self._x, self._y, self._cos, self._sin, self._speed
+
+        i = 0
+        while i < self._count:
+            speed = speeds[i]
+            x[i] += cos[i] * speed
+            y[i] += sin[i] * speed
+
+            speed = max(speed - 0.1, 0)
+            if speed == 0:
+                last = self._count - 1
+                x[i], y[i], cos[i], sin[i] = x[last], y[last], cos[last], sin[last]
+                speeds[i] = speeds[last]
+                self._count = last
+                continue
+
+            speeds[i] = speed
+            i += 1
+
+    def render(
+        self,
+        display: pygame.Surface,
+        offset: Vec2 = Vec2(0, 0),
+        outline: OutlineRenderer | None = None,
+    ) -> None:
+        polygons = self.polygons(offset)
+        draw_polygon = pygame.draw.polygon
+        for points in polygons:
+            draw_polygon(display, (255, 255, 255), points)
+        if outline is not None:
+            outline.add_polygons(polygons)
+
+    def polygons(self, offset: Vec2 = Vec2(0, 0)) -> list[tuple]:
+        """Vertices of every live spark: a diamond stretched along its heading."""
+        offset_x, offset_y = offset
+        polygons = []
+
+        for i in range(self._count):
+            x, y = self._x[i], self._y[i]
+            long_x = self._cos[i] * self._speed[i] * 3
+            long_y = self._sin[i] * self._speed[i] * 3
+            short_x = self._cos[i] * self._speed[i] * 0.5
+            short_y = self._sin[i] * self._speed[i] * 0.5
+
+            polygons.append(
+                (
+                    (x + long_x - offset_x, y + long_y - offset_y),
+                    (x - short_y - offset_x, y + short_x - offset_y),
+                    (x - long_x - offset_x, y - long_y - offset_y),
+                    (x + short_y - offset_x, y - short_x - offset_y),
+                )
+            )
+
+        return polygons
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+from typing import Hashable, Iterator
+
+import pygame
+
+
+class SpatialGrid:
+    """Uniform grid of buckets indexing items by their bounding rect.
+
+    Every item is stored in each cell its rect overlaps, so rect and point
+    queries only look at the items registered in the cells they touch.
+    Moving items are updated in place with `move`, which only touches the
+    buckets when the item crosses a cell border.
+    """
+
+    def __init__(self, cell_size: int = 64) -> None:
+        self._cell_size = cell_size
+        self._cells: dict[tuple[int, int], set[Hashable]] = {}
+        self._rects: dict[Hashable, pygame.Rect] = {}
+
+    def __len__(self) -> int:
+        return len(self._rects)
+
+    def __contains__(self, item: Hashable) -> bool:
+        return item in self._rects
+
+    def _cells_of(self, rect: pygame.Rect) -> Iterator[tuple[int, int]]:
+        size = self._cell_size
+        for cx in range(rect.left // size, (rect.right - 1) // size + 1):
+            for cy in range(rect.top // size, (rect.bottom - 1) // size + 1):
+                yield cx, cy
+
+    def insert(self, item: Hashable, rect: pygame.Rect) -> None:
+        if item in self._rects:
+            self.remove(item)
+
+        self._rects[item] = pygame.Rect(rect)
+        for cell in self._cells_of(rect):
+            self._cells.setdefault(cell, set()).add(item)
+
+    def remove(self, item: Hashable) -> None:
+        rect = self._rects.pop(item)
+        for cell in self._cells_of(rect):
+            bucket = self._cells[cell]
+            bucket.discard(item)
+            if not bucket:
+                del self._cells[cell]
+
+    def move(self, item: Hashable, rect: pygame.Rect) -> None:
+        old = self._rects[item]
+        if old == rect:
+            return
+
+        size = self._cell_size
+        if (
+            old.left // size == rect.left // size
+            and old.top // size == rect.top // size
+            and (old.right - 1) // size == (rect.right - 1) // size
+            and (old.bottom - 1) // size == (rect.bottom - 1) // size
+        ):
+            old.update(rect)
+            return
+
+        old_cells = set(self._cells_of(old))
+        new_cells = set(self._cells_of(rect))
+        for cell in old_cells - new_cells:
+            bucket = self._cells[cell]
+            bucket.discard(item)
+            if not bucket:
+                del self._cells[cell]
+        for cell in new_cells - old_cells:
+            self._cells.setdefault(cell, set()).add(item)
+        old.update(rect)
+
+    def clear(self) -> None:
+        self._cells.clear()
+        self._rects.clear()
+
+    def rect(self, item: Hashable) -> pygame.Rect:
+        return self._rects[item]
+
+    def query_rect(self, rect: pygame.Rect) -> set[Hashable]:
+        found = set()
+        for cell in self._cells_of(rect):
+            if cell in self._cells:
+                for item in self._cells[cell]:
+                    if item not in found and rect.colliderect(self._rects[item]):
+                        found.add(item)
+        return found
+
+    def query_point(self, point: tuple[float, float]) -> set[Hashable]:
+        x, y = int(point[0] // self._cell_size), int(point[1] // self._cell_size)
+        if (x, y) not in self._cells:
+            return set()
+        return {
+            item for item in self._cells[x, y] if self._rects[item].collidepoint(point)
+        }
+
+    def pairs(self) -> Iterator[tuple[Hashable, Hashable]]:
+        """Every pair of items with overlapping rects, once, in no set order."""
+        size = self._cell_size
+        for cell, bucket in self._cells.items():
+            if len(bucket) < 2:
+                continue
+
+            items = list(bucket)
+            for i, item in enumerate(items):
+                rect = self._rects[item]
+                for other in items[i + 1 :]:
+                    other_rect = self._rects[other]
+                    if not rect.colliderect(other_rect):
+                        continue
+                    # reported by the one cell holding the overlap's top left
+                    left = max(rect.left, other_rect.left)
+                    top = max(rect.top, other_rect.top)
+                    if (left // size, top // size) == cell:
+                        yield item, other
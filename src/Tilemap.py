@@ -1,22 +1,15 @@
 from __future__ import annotations
 
-import json
-from typing import Any, Iterator
+import math
+from typing import Any, Iterator, Sequence
 
 import pygame
 from pygame import Vector2 as Vec2
 
-NEIGHBOURS_OFFSETS = [
-    (-1, -1),
-    (-1, 0),
-    (-1, 1),
-    (0, -1),
-    (0, 0),
-    (0, 1),
-    (1, -1),
-    (1, 0),
-    (1, 1),
-]
+from src.MapFile import read_map, write_map
+from src.Outline import bake_outline
+from src.SpatialGrid import SpatialGrid
+
 AUTOTILE_NEIGHBOURS_OFFSETS = [(-1, 0), (0, -1), (1, 0), (0, 1)]
 
 AUTOTILE_RULES = {
@@ -34,137 +27,638 @@ AUTOTILE_RULES = {
 PHYSICS_TILES = {"grass", "stone"}
 AUTOTILES_TYPES = {"grass", "stone"}
 
+# bits of the sides a box hit in Tilemap.move_box
+COLLISION_UP = 1
+COLLISION_DOWN = 2
+COLLISION_RIGHT = 4
+COLLISION_LEFT = 8
+
+CHUNK_SIZE = 16  # chunk width and height in tiles
+CHUNK_CELLS = CHUNK_SIZE * CHUNK_SIZE
+
+
+class _GridChunk:
+    """Type ids and variants of the CHUNK_SIZE x CHUNK_SIZE cells of a chunk.
+
+    Cells are stored row by row, a type id of 0 marks an empty cell.
+    """
+
+    __slots__ = ("types", "variants", "count")
+
+    def __init__(self) -> None:
+        self.types = bytearray(CHUNK_CELLS)
+        self.variants = bytearray(CHUNK_CELLS)
+        self.count = 0
+
 
 class Tilemap:
     def __init__(self, assets: dict[str, Any], tile_size: int = 16) -> None:
         self._assets = assets
         self._tile_size = tile_size
-        self._tiles: dict[tuple[int, int], dict] = {}
-        self._offgrid_tiles = []
+        # grid tiles in sparse chunks, with their types interned to byte ids
+        self._grid: dict[tuple[int, int], _GridChunk] = {}
+        self._type_names: list[str] = [""]
+        self._type_ids: dict[str, int] = {}
+        self._physics_types = bytearray(1)
+        # off-grid tiles keyed by insertion id, which is also their draw order
+        self._offgrid_tiles: dict[int, dict] = {}
+        self._offgrid_index = SpatialGrid(cell_size=tile_size * 4)
+        self._next_offgrid_id = 0
+
+        # pre-rendered chunks of CHUNK_SIZE x CHUNK_SIZE tiles, rebaked lazily
+        self._chunks: dict[tuple[int, int], pygame.Surface] = {}
+        self._chunk_outlines: dict[tuple[int, int], pygame.Surface] = {}
+        self._dirty_chunks: set[tuple[int, int]] = set()
+        # how many tiles a grid tile image can overhang to the right or down
+        self._grid_spill = 0
+
+        # one byte per cell of the bounding box of solid tiles
+        self._solid = bytearray()
+        self._solid_origin = (0, 0)
+        self._solid_width = 0
+        self._solid_height = 0
+        # rects of solid cells shared between queries, must not be mutated
+        self._physics_rects: dict[int, pygame.Rect] = {}
 
     def render(
         self,
         display: pygame.Surface,
         offset: Vec2 = Vec2(0, 0),
-    ) -> None:
-        self._render_offgrid_tiles(display, offset)
-        self._render_grid_tiles(display, offset)
+    ) -> int:
+        blits = []
 
-    def _render_offgrid_tiles(
-        self,
-        display: pygame.Surface,
-        offset: Vec2,
-    ) -> None:
-        for tile in self._offgrid_tiles:
-            pos = Vec2(tile["pos"]) - offset
-            display.blit(self._assets[tile["type"]][tile["variant"]], pos)
+        for key, (x, y) in self._visible_chunks(display, offset):
+            blits.append((self._chunks[key], (x, y)))
+
+        display.blits(blits, doreturn=False)
+        return len(blits)
 
-    def _render_grid_tiles(
+    def render_outline(
         self,
         display: pygame.Surface,
-        offset: Vec2,
-    ) -> None:
-        for x in range(
-            int(offset.x) // self._tile_size,
-            int(offset.x + display.get_width()) // self._tile_size + 1,
+        offset: Vec2 = Vec2(0, 0),
+    ) -> int:
+        blits = []
+
+        for key, (x, y) in self._visible_chunks(display, offset):
+            if key not in self._chunk_outlines:
+                self._chunk_outlines[key] = bake_outline(self._chunks[key])
+            blits.append((self._chunk_outlines[key], (x - 1, y - 1)))
+
+        display.blits(blits, doreturn=False)
+        return len(blits)
+
+    def _visible_chunks(
+        self, display: pygame.Surface, offset: Vec2
+    ) -> Iterator[tuple[tuple[int, int], tuple[int, int]]]:
+        chunk_px = self._tile_size * CHUNK_SIZE
+        offset_x, offset_y = int(offset.x), int(offset.y)
+
+        for cx in range(
+            (offset_x - 1) // chunk_px,
+            (offset_x + display.get_width()) // chunk_px + 1,
         ):
+            for cy in range(
+                (offset_y - 1) // chunk_px,
+                (offset_y + display.get_height()) // chunk_px + 1,
+            ):
+                key = cx, cy
+                if key in self._dirty_chunks:
+                    self._bake_chunk(key)
+                if key in self._chunks:
+                    yield key, (cx * chunk_px - offset_x, cy * chunk_px - offset_y)
+
+    def _bake_chunk(self, key: tuple[int, int]) -> None:
+        self._dirty_chunks.discard(key)
+        self._chunk_outlines.pop(key, None)
+
+        chunk_px = self._tile_size * CHUNK_SIZE
+        chunk_rect = pygame.Rect(
+            key[0] * chunk_px, key[1] * chunk_px, chunk_px, chunk_px
+        )
+        blits = []
+
+        for tile_id in sorted(self._offgrid_index.query_rect(chunk_rect)):
+            rect = self._offgrid_index.rect(tile_id)
+            dest = rect.x - chunk_rect.x, rect.y - chunk_rect.y
+            blits.append((self._tile_image(self._offgrid_tiles[tile_id]), dest))
+
+        first_x = key[0] * CHUNK_SIZE
+        first_y = key[1] * CHUNK_SIZE
+        for x in range(first_x - self._grid_spill, first_x + CHUNK_SIZE):
+            for y in range(first_y - self._grid_spill, first_y + CHUNK_SIZE):
+                type_id, variant = self._get_cell(x, y)
+                if type_id:
+                    dest = (
+                        x * self._tile_size - chunk_rect.x,
+                        y * self._tile_size - chunk_rect.y,
+                    )
+                    blits.append((self._grid_image(type_id, variant), dest))
+
+        if not blits:
+            self._chunks.pop(key, None)
+            return
+
+        if key in self._chunks:
+            surf = self._chunks[key]
+            surf.fill((0, 0, 0, 0))
+        else:
+            surf = pygame.Surface(chunk_rect.size, pygame.SRCALPHA)
+            self._chunks[key] = surf
+        surf.blits(blits, doreturn=False)
+
+    def _type_id(self, type: str) -> int:
+        if type not in self._type_ids:
+            if len(self._type_names) == 256:
+                raise ValueError("a tilemap supports up to 255 grid tile types")
+            self._type_ids[type] = len(self._type_names)
+            self._type_names.append(type)
+            self._physics_types.append(type in PHYSICS_TILES)
+        return self._type_ids[type]
+
+    def _get_cell(self, x: int, y: int) -> tuple[int, int]:
+        """Type id and variant of a grid cell, type id 0 if it is empty."""
+        chunk = self._grid.get((x // CHUNK_SIZE, y // CHUNK_SIZE))
+        if chunk is None:
+            return 0, 0
+        index = (y % CHUNK_SIZE) * CHUNK_SIZE + x % CHUNK_SIZE
+        return chunk.types[index], chunk.variants[index]
+
+    def _set_cell(self, x: int, y: int, type_id: int, variant: int = 0) -> None:
+        key = x // CHUNK_SIZE, y // CHUNK_SIZE
+        chunk = self._grid.get(key)
+        if chunk is None:
+            if not type_id:
+                return
+            chunk = self._grid[key] = _GridChunk()
+
+        index = (y % CHUNK_SIZE) * CHUNK_SIZE + x % CHUNK_SIZE
+        chunk.count += (type_id != 0) - (chunk.types[index] != 0)
+        chunk.types[index] = type_id
+        chunk.variants[index] = variant
+
+        if chunk.count == 0:
+            del self._grid[key]
+
+    def _grid_cells(self) -> Iterator[tuple[int, int, int, int]]:
+        """(x, y, type id, variant) of every grid tile, chunk by chunk."""
+        for cx, cy in sorted(self._grid):
+            chunk = self._grid[cx, cy]
+            types, variants = chunk.types, chunk.variants
+            for index in range(CHUNK_CELLS):
+                if types[index]:
+                    yield (
+                        cx * CHUNK_SIZE + index % CHUNK_SIZE,
+                        cy * CHUNK_SIZE + index // CHUNK_SIZE,
+                        types[index],
+                        variants[index],
+                    )
+
+    def _tile_image(self, tile: dict) -> pygame.Surface:
+        return self._assets[tile["type"]][tile["variant"]]
+
+    def _grid_image(self, type_id: int, variant: int) -> pygame.Surface:
+        return self._assets[self._type_names[type_id]][variant]
+
+    def _grid_tile_rect(
+        self, x: int, y: int, type_id: int, variant: int
+    ) -> pygame.Rect:
+        pos = x * self._tile_size, y * self._tile_size
+        return pygame.Rect(pos, self._grid_image(type_id, variant).get_size())
+
+    def _offgrid_tile_rect(self, tile: dict) -> pygame.Rect:
+        pos = math.floor(tile["pos"][0]), math.floor(tile["pos"][1])
+        return pygame.Rect(pos, self._tile_image(tile).get_size())
+
+    def dirty_rects(self, view: pygame.Rect) -> list[pygame.Rect]:
+        """Chunks in `view` changed since they were last rendered."""
+        chunk_px = self._tile_size * CHUNK_SIZE
+        rects = []
+        for cx, cy in self._dirty_chunks:
+            rect = pygame.Rect(cx * chunk_px, cy * chunk_px, chunk_px, chunk_px)
+            if rect.colliderect(view):
+                rects.append(rect)
+        return rects
+
+    def _invalidate(self, rect: pygame.Rect) -> None:
+        chunk_px = self._tile_size * CHUNK_SIZE
+        for cx in range(rect.left // chunk_px, (rect.right - 1) // chunk_px + 1):
+            for cy in range(rect.top // chunk_px, (rect.bottom - 1) // chunk_px + 1):
+                self._dirty_chunks.add((cx, cy))
+
+    def _invalidate_grid_tile(self, x: int, y: int, type_id: int, variant: int) -> None:
+        rect = self._grid_tile_rect(x, y, type_id, variant)
+        spill = -(-max(rect.width, rect.height) // self._tile_size) - 1
+        self._grid_spill = max(self._grid_spill, spill)
+        self._invalidate(rect)
+
+    def set_tile(self, pos: tuple[int, int], type: str, variant: int) -> None:
+        x, y = pos
+        type_id = self._type_id(type)
+        old_type_id, old_variant = self._get_cell(x, y)
+        if old_type_id:
+            if old_type_id == type_id and old_variant == variant:
+                return
+            self._invalidate_grid_tile(x, y, old_type_id, old_variant)
+
+        self._set_cell(x, y, type_id, variant)
+        self._invalidate_grid_tile(x, y, type_id, variant)
+        self._update_solidity(pos)
+
+    def remove_tile(self, pos: tuple[int, int]) -> None:
+        x, y = pos
+        type_id, variant = self._get_cell(x, y)
+        if type_id:
+            self._set_cell(x, y, 0)
+            self._invalidate_grid_tile(x, y, type_id, variant)
+            self._update_solidity(pos)
+
+    def _insert_offgrid_tile(self, tile: dict) -> None:
+        tile_id = self._next_offgrid_id
+        self._next_offgrid_id += 1
+
+        rect = self._offgrid_tile_rect(tile)
+        self._offgrid_tiles[tile_id] = tile
+        self._offgrid_index.insert(tile_id, rect)
+        self._invalidate(rect)
+
+    def _delete_offgrid_tile(self, tile_id: int) -> None:
+        self._invalidate(self._offgrid_index.rect(tile_id))
+        self._offgrid_index.remove(tile_id)
+        del self._offgrid_tiles[tile_id]
+
+    def add_offgrid_tile(self, type: str, variant: int, pos: tuple) -> None:
+        self._insert_offgrid_tile({"type": type, "variant": variant, "pos": pos})
+
+    def remove_offgrid_tiles_at(self, point: tuple) -> None:
+        for tile_id in self._offgrid_index.query_point(point):
+            self._delete_offgrid_tile(tile_id)
+
+    def offgrid_tiles_at(self, point: tuple) -> list[dict]:
+        ids = sorted(self._offgrid_index.query_point(point))
+        return [self._offgrid_tiles[tile_id] for tile_id in ids]
+
+    def offgrid_tiles_in(self, rect: pygame.Rect) -> list[dict]:
+        ids = sorted(self._offgrid_index.query_rect(rect))
+        return [self._offgrid_tiles[tile_id] for tile_id in ids]
+
+    def _build_solidity(self) -> None:
+        solid = [
+            (x, y)
+            for x, y, type_id, _ in self._grid_cells()
+            if self._physics_types[type_id]
+        ]
+        self._physics_rects = {}
+
+        if not solid:
+            self._solid = bytearray()
+            self._solid_origin = (0, 0)
+            self._solid_width = self._solid_height = 0
+            return
+
+        min_x = min(x for x, _ in solid)
+        min_y = min(y for _, y in solid)
+        self._solid_origin = (min_x, min_y)
+        self._solid_width = max(x for x, _ in solid) - min_x + 1
+        self._solid_height = max(y for _, y in solid) - min_y + 1
+        self._solid = bytearray(self._solid_width * self._solid_height)
+
+        for x, y in solid:
+            self._solid[(y - min_y) * self._solid_width + x - min_x] = 1
+
+    def _update_solidity(self, pos: tuple[int, int]) -> None:
+        solid = self._physics_types[self._get_cell(*pos)[0]]
+        x = pos[0] - self._solid_origin[0]
+        y = pos[1] - self._solid_origin[1]
+
+        if 0 <= x < self._solid_width and 0 <= y < self._solid_height:
+            index = y * self._solid_width + x
+            self._solid[index] = solid
+            self._physics_rects.pop(index, None)
+        elif solid:
+            self._build_solidity()
+
+    def is_solid(self, tile_x: int, tile_y: int) -> bool:
+        x = tile_x - self._solid_origin[0]
+        y = tile_y - self._solid_origin[1]
+        return (
+            0 <= x < self._solid_width
+            and 0 <= y < self._solid_height
+            and self._solid[y * self._solid_width + x] == 1
+        )
+
+    def _solid_rects_in_cells(
+        self, left: int, top: int, right: int, bottom: int
+    ) -> list[pygame.Rect]:
+        origin_x, origin_y = self._solid_origin
+        width = self._solid_width
+        solid = self._solid
+        rects = []
+
+        for x in range(max(left - origin_x, 0), min(right - origin_x, width - 1) + 1):
             for y in range(
-                int(offset.y) // self._tile_size,
-                int(offset.y + display.get_height()) // self._tile_size + 1,
+                max(top - origin_y, 0),
+                min(bottom - origin_y, self._solid_height - 1) + 1,
             ):
-                pos = x, y
-                if pos in self._tiles:
-                    tile = self._tiles[pos]
-                    dest = Vec2(pos) * self._tile_size - offset
-                    display.blit(self._assets[tile["type"]][tile["variant"]], dest)
+                index = y * width + x
+                if solid[index]:
+                    if index not in self._physics_rects:
+                        self._physics_rects[index] = pygame.Rect(
+                            (x + origin_x) * self._tile_size,
+                            (y + origin_y) * self._tile_size,
+                            self._tile_size,
+                            self._tile_size,
+                        )
+                    rects.append(self._physics_rects[index])
 
-    def _get_tiles_around(self, position: Vec2) -> Iterator[dict]:
-        tile_x = int(position.x // self._tile_size)
-        tile_y = int(position.y // self._tile_size)
+        return rects
 
-        for offset_x, offset_y in NEIGHBOURS_OFFSETS:
-            tile_pos = tile_x + offset_x, tile_y + offset_y
+    def get_physics_rects_around(self, position: Vec2) -> list[pygame.Rect]:
+        tile_x = int(position[0] // self._tile_size)
+        tile_y = int(position[1] // self._tile_size)
+        return self._solid_rects_in_cells(
+            tile_x - 1, tile_y - 1, tile_x + 1, tile_y + 1
+        )
 
-            if tile_pos in self._tiles:
-                yield self._tiles[tile_pos]
+    def get_physics_rects_in(self, rect: pygame.Rect) -> list[pygame.Rect]:
+        return self._solid_rects_in_cells(
+            rect.left // self._tile_size,
+            rect.top // self._tile_size,
+            (rect.right - 1) // self._tile_size,
+            (rect.bottom - 1) // self._tile_size,
+        )
 
-    def get_physics_rects_around(self, position: Vec2) -> Iterator[pygame.Rect]:
-        for tile in self._get_tiles_around(position):
-            if tile["type"] in PHYSICS_TILES:
-                rect_pos = Vec2(tile["pos"]) * self._tile_size
-                yield pygame.Rect(rect_pos, (self._tile_size, self._tile_size))
+    def get_physics_rects_batch(
+        self, rects: Sequence[pygame.Rect]
+    ) -> list[list[pygame.Rect]]:
+        return [self.get_physics_rects_in(rect) for rect in rects]
 
     def check_solid_tile(self, position: Vec2) -> bool:
-        x, y = tuple(position // self._tile_size)
-        key = int(x), int(y)
-        return key in self._tiles and self._tiles[key]["type"] in PHYSICS_TILES
+        return self.is_solid(
+            int(position[0] // self._tile_size), int(position[1] // self._tile_size)
+        )
+
+    def move_box(
+        self, x: float, y: float, width: int, height: int, dx: float, dy: float
+    ) -> tuple[float, float, int]:
+        """Move a box by (dx, dy), stopping it at the first solid tile in its way
+
+        Moves along x, then along y. Each axis walks the cells between the
+        box and its destination one column (row for y) at a time, nearest
+        first, so boxes of any speed and size stop at the first solid tile
+        instead of tunnelling through it, and a move costs one check per
+        crossed column or row. Like pygame.Rect, the box starts at the whole
+        pixel (int(x), int(y)).
+
+        Args:
+            x (float): left of the box
+            y (float): top of the box
+            width (int): width of the box
+            height (int): height of the box
+            dx (float): horizontal movement
+            dy (float): vertical movement
+
+        Returns:
+            tuple[float, float, int]: new left and top of the box and the
+            COLLISION_* bits of the sides that hit a tile
+        """
+        tile_size = self._tile_size
+        origin_x, origin_y = self._solid_origin
+        width, height = int(width), int(height)
+        left, top = int(x), int(y)
+        if not self._any_solid(left, top, int(x + dx), int(y + dy), width, height):
+            return x + dx, y + dy, 0
+
+        collisions = 0
+        x += dx
+        new_left = int(x)
+        first_row = top // tile_size - origin_y
+        last_row = (top + height - 1) // tile_size - origin_y
+        if dx > 0:
+            # from the first column the box was not in yet, or it is stuck in
+            start = min(new_left // tile_size, (left + width - 1) // tile_size + 1)
+            end = (new_left + width - 1) // tile_size
+            column = self._first_solid_column(
+                start - origin_x, end - origin_x, first_row, last_row
+            )
+            if column is not None:
+                x = (column + origin_x) * tile_size - width
+                collisions |= COLLISION_RIGHT
+        elif dx < 0:
+            start = max((new_left + width - 1) // tile_size, left // tile_size - 1)
+            end = new_left // tile_size
+            column = self._first_solid_column(
+                start - origin_x, end - origin_x, first_row, last_row
+            )
+            if column is not None:
+                x = (column + origin_x + 1) * tile_size
+                collisions |= COLLISION_LEFT
+        elif (
+            self._first_solid_column(
+                left // tile_size - origin_x,
+                (left + width - 1) // tile_size - origin_x,
+                first_row,
+                last_row,
+            )
+            is not None
+        ):
+            # a box stuck in a tile is only snapped to whole pixels
+            x = left
+
+        left = int(x)
+        y += dy
+        new_top = int(y)
+        first_column = left // tile_size - origin_x
+        last_column = (left + width - 1) // tile_size - origin_x
+        if dy > 0:
+            start = min(new_top // tile_size, (top + height - 1) // tile_size + 1)
+            end = (new_top + height - 1) // tile_size
+            row = self._first_solid_row(
+                start - origin_y, end - origin_y, first_column, last_column
+            )
+            if row is not None:
+                y = (row + origin_y) * tile_size - height
+                collisions |= COLLISION_DOWN
+        elif dy < 0:
+            start = max((new_top + height - 1) // tile_size, top // tile_size - 1)
+            end = new_top // tile_size
+            row = self._first_solid_row(
+                start - origin_y, end - origin_y, first_column, last_column
+            )
+            if row is not None:
+                y = (row + origin_y + 1) * tile_size
+                collisions |= COLLISION_UP
+        elif (
+            self._first_solid_row(
+                top // tile_size - origin_y,
+                (top + height - 1) // tile_size - origin_y,
+                first_column,
+                last_column,
+            )
+            is not None
+        ):
+            y = top
+
+        return x, y, collisions
+
+    def _any_solid(
+        self, left: int, top: int, new_left: int, new_top: int, width: int, height: int
+    ) -> bool:
+        """Whether a box moving from (left, top) to (new_left, new_top) can
+        touch any solid cell, in pixels."""
+        tile_size = self._tile_size
+        origin_x, origin_y = self._solid_origin
+        grid_width = self._solid_width
+
+        if new_left < left:
+            left, new_left = new_left, left
+        if new_top < top:
+            top, new_top = new_top, top
+        first_column = left // tile_size - origin_x
+        last_column = (new_left + width - 1) // tile_size - origin_x
+        first_row = top // tile_size - origin_y
+        last_row = (new_top + height - 1) // tile_size - origin_y
+        if first_column < 0:
+            first_column = 0
+        if last_column >= grid_width:
+            last_column = grid_width - 1
+        if first_row < 0:
+            first_row = 0
+        if last_row >= self._solid_height:
+            last_row = self._solid_height - 1
+
+        solid = self._solid
+        for row in range(first_row, last_row + 1):
+            start = row * grid_width
+            if 1 in solid[start + first_column : start + last_column + 1]:
+                return True
+        return False
+
+    def _first_solid_column(
+        self, start: int, end: int, first_row: int, last_row: int
+    ) -> int | None:
+        """First column from `start` to `end`, either way, that has a solid
+        cell in the rows, all counted in cells of the solidity grid."""
+        width = self._solid_width
+        first_row = max(first_row, 0)
+        last_row = min(last_row, self._solid_height - 1)
+        if first_row > last_row:
+            return None
+
+        if start <= end:
+            columns = range(max(start, 0), min(end, width - 1) + 1)
+        else:
+            columns = range(min(start, width - 1), max(end, 0) - 1, -1)
+        for column in columns:
+            # every `width`th cell is one column of the grid
+            if (
+                1
+                in self._solid[
+                    first_row * width + column : (last_row + 1) * width + column : width
+                ]
+            ):
+                return column
+        return None
+
+    def _first_solid_row(
+        self, start: int, end: int, first_column: int, last_column: int
+    ) -> int | None:
+        """First row from `start` to `end`, either way, that has a solid cell
+        in the columns, all counted in cells of the solidity grid."""
+        width = self._solid_width
+        first_column = max(first_column, 0)
+        last_column = min(last_column, width - 1)
+        if first_column > last_column:
+            return None
+
+        if start <= end:
+            rows = range(max(start, 0), min(end, self._solid_height - 1) + 1)
+        else:
+            rows = range(min(start, self._solid_height - 1), max(end, 0) - 1, -1)
+        for row in rows:
+            if (
+                1
+                in self._solid[
+                    row * width + first_column : row * width + last_column + 1
+                ]
+            ):
+                return row
+        return None
 
     def extract(self, type: str, variant: int, keep: bool = False) -> Iterator[dict]:
-        for pos, tile in self._tiles.copy().items():
-            if tile["type"] == type and tile["variant"] == variant:
-                tile_copy = tile.copy()
-                tile_copy["pos"] = (
-                    tile["pos"][0] * self._tile_size,
-                    tile["pos"][1] * self._tile_size,
-                )
+        type_id = self._type_ids.get(type)
+        cells = list(self._grid_cells()) if type_id is not None else []
+
+        for x, y, cell_type_id, cell_variant in cells:
+            if cell_type_id == type_id and cell_variant == variant:
                 if not keep:
-                    del self._tiles[pos]
-                yield tile_copy
+                    self._set_cell(x, y, 0)
+                    self._invalidate_grid_tile(x, y, type_id, variant)
+                    self._update_solidity((x, y))
+                yield {
+                    "type": type,
+                    "variant": variant,
+                    "pos": (x * self._tile_size, y * self._tile_size),
+                }
 
-        for tile in self._offgrid_tiles.copy():
+        for tile_id, tile in self._offgrid_tiles.copy().items():
             if tile["type"] == type and tile["variant"] == variant:
                 if not keep:
-                    self._offgrid_tiles.remove(tile)
+                    self._delete_offgrid_tile(tile_id)
                 yield tile
 
     def load(self, path: str) -> None:
-        self._tiles = {}
-        self._offgrid_tiles = []
+        self.load_data(*read_map(path))
 
-        with open(path, "r") as f:
-            data = json.load(f)
+    def load_data(
+        self, tile_size: int, tiles: list[dict], offgrid_tiles: list[dict]
+    ) -> None:
+        """Replace the map with tiles as returned by read_map, left unchanged."""
+        self._grid = {}
+        self._offgrid_tiles = {}
+        self._chunks = {}
+        self._chunk_outlines = {}
+        self._dirty_chunks = set()
+        self._grid_spill = 0
+
+        self._tile_size = tile_size
+        self._offgrid_index = SpatialGrid(cell_size=self._tile_size * 4)
 
-            self._tile_size = data["tile_size"]
+        for tile in tiles:
+            x, y = tile["pos"]
+            type_id = self._type_id(tile["type"])
+            self._set_cell(x, y, type_id, tile["variant"])
+            self._invalidate_grid_tile(x, y, type_id, tile["variant"])
 
-            for key in data["tilemap"]:
-                tile = data["tilemap"][key]
-                pos = tuple(tile["pos"])
-                self._tiles[pos] = tile
+        for tile in offgrid_tiles:
+            self._insert_offgrid_tile({**tile, "pos": tuple(tile["pos"])})
 
-            for tile in data["offgrid"]:
-                tile["pos"] = tuple(tile["pos"])
-                self._offgrid_tiles.append(tile)
+        self._build_solidity()
 
     def save(self, path: str) -> None:
-        with open(path, "w") as f:
-            tilemap = {}
-            for x, y in self._tiles:
-                tilemap[f"{x};{y}"] = self._tiles[x, y]
-
-            json.dump(
-                {
-                    "tile_size": self._tile_size,
-                    "tilemap": tilemap,
-                    "offgrid": self._offgrid_tiles,
-                },
-                f,
-            )
+        tiles = [
+            {"type": self._type_names[type_id], "variant": variant, "pos": (x, y)}
+            for x, y, type_id, variant in self._grid_cells()
+        ]
+        write_map(path, self._tile_size, tiles, list(self._offgrid_tiles.values()))
 
     def autotile(self) -> None:
-        for x, y in self._tiles:
-            tile = self._tiles[x, y]
-
-            if tile["type"] not in AUTOTILES_TYPES:
+        for x, y, type_id, variant in list(self._grid_cells()):
+            if self._type_names[type_id] not in AUTOTILES_TYPES:
                 continue
 
             neighbours = []
 
             for i, (offset_x, offset_y) in enumerate(AUTOTILE_NEIGHBOURS_OFFSETS):
-                pos = x + offset_x, y + offset_y
-                if pos in self._tiles and tile["type"] == self._tiles[pos]["type"]:
+                if self._get_cell(x + offset_x, y + offset_y)[0] == type_id:
                     neighbours.append(i)
 
-            neighbours = tuple(sorted(neighbours))
+            neighbours = tuple(neighbours)
 
             if neighbours in AUTOTILE_RULES:
-                tile["variant"] = AUTOTILE_RULES[neighbours]
+                if variant != AUTOTILE_RULES[neighbours]:
+                    self._invalidate_grid_tile(x, y, type_id, variant)
+                    self._set_cell(x, y, type_id, AUTOTILE_RULES[neighbours])
+                    self._invalidate_grid_tile(
+                        x, y, type_id, AUTOTILE_RULES[neighbours]
+                    )
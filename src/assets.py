@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import functools
+import os
+
+from src.Animation import Animation
+from src.AssetManager import AssetManager
+from src.MapFile import BINARY_MAP_EXTENSION, JSON_MAP_EXTENSION, read_map
+from src.utils import flip_image, load_image, load_images
+
+MAPS_DIR = "assets/maps/"
+
+# loaded on first use, see AssetManager
+GAME_ASSETS = {
+    "background": lambda: load_image("background.png"),
+    "clouds": lambda: load_images("clouds"),
+    # tiles graphics with variants
+    "grass": lambda: load_images("tiles/grass"),
+    "stone": lambda: load_images("tiles/stone"),
+    "decor": lambda: load_images("tiles/decor"),
+    "large_decor": lambda: load_images("tiles/large_decor"),
+    "spawners": lambda: load_images("tiles/spawners"),
+    # player graphics with animations
+    "player": lambda: load_image("entities/player.png"),
+    "player/idle": lambda: Animation(load_images("entities/player/idle"), duration=6),
+    "player/run": lambda: Animation(load_images("entities/player/run"), duration=4),
+    "player/jump": lambda: Animation(load_images("entities/player/jump")),
+    "player/wall_slide": lambda: Animation(load_images("entities/player/wall_slide")),
+    # enemies graphics
+    "enemy/idle": lambda: Animation(load_images("entities/enemy/idle"), duration=6),
+    "enemy/run": lambda: Animation(load_images("entities/enemy/run"), duration=4),
+    "gun": lambda: load_image("gun.png"),
+    "gun/flipped": lambda: flip_image(load_image("gun.png")),
+    "projectile": lambda: load_image("projectile.png"),
+    # particles animations
+    "particle/leaf": lambda: Animation(
+        load_images("particles/leaf"), duration=20, loop=False
+    ),
+    "particle/particle": lambda: Animation(
+        load_images("particles/particle"), loop=False
+    ),
+}
+
+
+def map_path(map_id: int) -> str:
+    """Binary map when it is converted and up to date, the JSON otherwise.
+
+    The editor saves JSON, a binary map older than its JSON source is left
+    out until it is converted again.
+    """
+    binary_path = f"{MAPS_DIR}{map_id}{BINARY_MAP_EXTENSION}"
+    json_path = f"{MAPS_DIR}{map_id}{JSON_MAP_EXTENSION}"
+    try:
+        binary_mtime = os.stat(binary_path).st_mtime_ns
+    except FileNotFoundError:
+        return json_path
+    try:
+        if os.stat(json_path).st_mtime_ns > binary_mtime:
+            return json_path
+    except FileNotFoundError:
+        pass
+    return binary_path
+
+
+def map_count() -> int:
+    """Number of maps, a map converted to binary counts once."""
+    return len({os.path.splitext(name)[0] for name in os.listdir(MAPS_DIR)})
+
+
+def register_game_assets(assets: AssetManager) -> int:
+    """Register every image, animation and map of the game
+
+    Maps are registered as level assets named "map/<id>".
+
+    Args:
+        assets (AssetManager): manager to register the loaders with
+
+    Returns:
+        int: number of maps
+    """
+    for name, loader in GAME_ASSETS.items():
+        assets.register(name, loader)
+
+    num_of_maps = map_count()
+    for map_id in range(num_of_maps):
+        assets.register(
+            f"map/{map_id}",
+            functools.partial(read_map, map_path(map_id)),
+            level=True,
+        )
+    return num_of_maps
@@ -1,3 +1,5 @@
+from __future__ import annotations
+
 import math
 import random
 from typing import Any
@@ -8,7 +10,9 @@ from pygame import Vector2 as Vec2
 
 from src.entities.Entity import Entity
 from src.entities.Player import Player
-from src.Spark import Spark
+from src.Outline import OutlineRenderer
+from src.ProjectileSystem import ProjectileSystem
+from src.SparkSystem import SparkSystem
 from src.Tilemap import Tilemap
 
 
@@ -16,17 +20,20 @@ class Enemy(Entity):
     def __init__(
         self,
         assets: dict[str, Any],
-        projectiles: list[list],
-        sparks: list[Spark],
+        projectiles: ProjectileSystem,
+        sparks: SparkSystem,
         player: Player,
         position: Vec2,
         size: Vec2,
+        rng: random.Random | None = None,
     ) -> None:
         super().__init__(assets, "enemy", position, size)
+        self._rng = rng if rng is not None else random.Random()
         self._projectiles = projectiles
         self._sparks = sparks
         self._player = player
         self._walking = 0
+        self._resting = False
 
     def update(self, tilemap: Tilemap) -> None:
         movement = Vec2(0, 0)
@@ -47,52 +54,64 @@ class Enemy(Entity):
 
             if self._walking == 0:
                 self._shoot()
-        elif random.random() < 0.01:
-            self._walking = random.randint(30, 120)
-
-        super().update(tilemap, movement)
+        elif self._rng.random() < 0.01:
+            self._walking = self._rng.randint(30, 120)
+
+        self._resting = (
+            movement.x == 0 and self._velocity.x == 0 and self._on_ground(tilemap)
+        )
+        if self._resting:
+            self._rest(movement)
+        else:
+            super().update(tilemap, movement)
 
         if movement.x != 0:
             self._set_action("run")
         else:
             self._set_action("idle")
 
+    @property
+    def is_resting(self) -> bool:
+        """Whether the last update skipped collisions, standing on the ground."""
+        return self._resting
+
     def _shoot(self) -> None:
         dist = self._player._position - self._position
 
         if abs(dist.y) < 16:
             if self._flip and dist.x < 0:
                 pos = Vec2(self.rect.centerx - 7, self.rect.centery)
-                dir = -1.5
-                self._projectiles.append([pos, dir, 0])
+                self._projectiles.spawn(pos, -1.5)
 
                 for _ in range(4):
-                    self._sparks.append(
-                        Spark(
-                            pos.copy(),
-                            random.random() - 0.5 + math.pi,
-                            2 + random.random(),
-                        )
+                    self._sparks.spawn(
+                        pos,
+                        self._rng.random() - 0.5 + math.pi,
+                        2 + self._rng.random(),
                     )
             if not self._flip and dist.x > 0:
                 pos = Vec2(self.rect.centerx + 7, self.rect.centery)
-                dir = 1.5
-                self._projectiles.append([pos, dir, 0])
+                self._projectiles.spawn(pos, 1.5)
 
                 for _ in range(4):
-                    self._sparks.append(
-                        Spark(
-                            pos.copy(),
-                            random.random() - 0.5,
-                            2 + random.random(),
-                        )
+                    self._sparks.spawn(
+                        pos, self._rng.random() - 0.5, 2 + self._rng.random()
                     )
 
-    def render(self, display: Surface, offset: Vec2 = Vec2(0, 0)) -> None:
-        super().render(display, offset)
+    def render(
+        self,
+        display: Surface,
+        offset: Vec2 = Vec2(0, 0),
+        outline: OutlineRenderer | None = None,
+        alpha: float = 1.0,
+    ) -> None:
+        super().render(display, offset, outline, alpha)
 
-        x, y = self.rect.center
-        gun_img = pygame.transform.flip(self._assets["gun"], self._flip, False)
+        x, y = pygame.Rect(self._interpolated_position(alpha), self._size).center
+        gun_img = self._assets["gun/flipped" if self._flip else "gun"]
         gun_x_offset = -gun_img.get_width() - 4 if self._flip else 4
+        position = Vec2(x + gun_x_offset, y) - offset
 
-        display.blit(gun_img, Vec2(x + gun_x_offset, y) - offset)
+        display.blit(gun_img, position)
+        if outline is not None:
+            outline.add(gun_img, position)
@@ -6,7 +6,14 @@ import pygame
 from pygame import Vector2 as Vec2
 
 from src.Animation import Animation
-from src.Tilemap import Tilemap
+from src.Outline import OutlineRenderer
+from src.Tilemap import (
+    COLLISION_DOWN,
+    COLLISION_LEFT,
+    COLLISION_RIGHT,
+    COLLISION_UP,
+    Tilemap,
+)
 
 G_FORCE = 0.1
 TERMINAL_VELOCITY = 5
@@ -20,6 +27,8 @@ class Entity:
         self._type = entity_type
         self._size = size
         self._position = position
+        self._previous_position = position.copy()
+        self._rect = pygame.Rect(position, size)
         self._velocity = Vec2(0, 0)
         self._collisions = {"up": False, "down": False, "right": False, "left": False}
         self._last_movement = Vec2(0, 0)
@@ -31,16 +40,35 @@ class Entity:
 
     @property
     def rect(self) -> pygame.Rect:
-        return pygame.Rect(self._position, self._size)
+        """Bounds at the current position, shared so it must not be modified."""
+        return self._rect
+
+    def _update_rect(self) -> None:
+        # truncated like pygame.Rect(position, size)
+        self._rect.x = int(self._position.x)
+        self._rect.y = int(self._position.y)
+
+    def state(self) -> tuple:
+        """Simulation state of the entity, as compared by replay checkpoints."""
+        return (
+            *self._position,
+            *self._velocity,
+            self._action,
+            self._anim_frame,
+            self._flip,
+        )
+
+    def _interpolated_position(self, alpha: float) -> Vec2:
+        return self._previous_position.lerp(self._position, alpha)
 
     def _set_action(self, action: str) -> None:
         if self._action != action:
             self._action = action
-            self._animation: Animation = self._assets[self._type + "/" + action].copy()
+            self._animation: Animation = self._assets[self._type + "/" + action]
+            self._anim_frame = 0
 
     def update(self, tilemap: Tilemap, movement: Vec2 = Vec2(0, 0)) -> None:
-        for key in self._collisions:
-            self._collisions[key] = False
+        self._previous_position.update(self._position)
 
         self._last_movement = movement
         frame_movement = movement + self._velocity
@@ -50,45 +78,58 @@ class Entity:
         elif movement.x < 0:
             self._flip = True
 
-        self._position.x += frame_movement.x
-        entity_rect = self.rect
+        self._position.x, self._position.y, collisions = tilemap.move_box(
+            self._position.x,
+            self._position.y,
+            self._size.x,
+            self._size.y,
+            frame_movement.x,
+            frame_movement.y,
+        )
+        self._collisions["up"] = bool(collisions & COLLISION_UP)
+        self._collisions["down"] = bool(collisions & COLLISION_DOWN)
+        self._collisions["right"] = bool(collisions & COLLISION_RIGHT)
+        self._collisions["left"] = bool(collisions & COLLISION_LEFT)
+        self._update_rect()
 
-        for tile_rect in tilemap.get_physics_rects_around(self._position):
-            if entity_rect.colliderect(tile_rect):
-                if frame_movement.x > 0:
-                    entity_rect.right = tile_rect.left
-                    self._collisions["right"] = True
-                elif frame_movement.x < 0:
-                    entity_rect.left = tile_rect.right
-                    self._collisions["left"] = True
+        self._velocity.y = min(TERMINAL_VELOCITY, self._velocity.y + G_FORCE)
 
-                self._position.x = entity_rect.x
+        if self._collisions["up"] or self._collisions["down"]:
+            self._velocity.y = 0
 
-        self._position.y += frame_movement.y
-        entity_rect = self.rect
+        self._anim_frame = self._animation.next_frame(self._anim_frame)
 
-        for tile_rect in tilemap.get_physics_rects_around(self._position):
-            if entity_rect.colliderect(tile_rect):
-                if frame_movement.y > 0:
-                    entity_rect.bottom = tile_rect.top
-                    self._collisions["down"] = True
-                elif frame_movement.y < 0:
-                    entity_rect.top = tile_rect.bottom
-                    self._collisions["up"] = True
+    def _on_ground(self, tilemap: Tilemap) -> bool:
+        """Whether the tile right below the middle of the entity is solid."""
+        return tilemap.check_solid_tile((self._rect.centerx, self._rect.bottom))
 
-                self._position.y = entity_rect.y
+    def _rest(self, movement: Vec2) -> None:
+        """Update of an entity standing still on the ground.
 
-        self._velocity.y = min(TERMINAL_VELOCITY, self._velocity.y + G_FORCE)
+        Skips the collision resolution, which would only find the ground
+        again, and drops the fraction of a pixel fallen since landing.
+        """
+        self._previous_position.update(self._position)
+        self._last_movement = movement
+        self._position.y = self._rect.y
+        self._velocity.y = 0
 
-        if self._collisions["up"] or self._collisions["down"]:
-            self._velocity.y = 0
+        self._collisions["up"] = False
+        self._collisions["down"] = True
+        self._collisions["right"] = False
+        self._collisions["left"] = False
 
-        self._animation.update()
+        self._anim_frame = self._animation.next_frame(self._anim_frame)
 
     def render(
         self,
         display: pygame.Surface,
         offset: Vec2 = Vec2(0, 0),
+        outline: OutlineRenderer | None = None,
+        alpha: float = 1.0,
     ) -> None:
-        img = pygame.transform.flip(self._animation.img(), self._flip, False)
-        display.blit(img, self._position - offset + self._anim_offset)
+        img = self._animation.img(self._anim_frame, self._flip)
+        position = self._interpolated_position(alpha) - offset + self._anim_offset
+        display.blit(img, position)
+        if outline is not None:
+            outline.add(img, position)
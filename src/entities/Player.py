@@ -1,3 +1,5 @@
+from __future__ import annotations
+
 import math
 import random
 from typing import Any
@@ -6,7 +8,8 @@ from pygame import Surface
 from pygame import Vector2 as Vec2
 
 from src.entities.Entity import Entity
-from src.Particle import Particle
+from src.Outline import OutlineRenderer
+from src.ParticleSystem import ParticleSystem
 from src.Tilemap import Tilemap
 
 
@@ -14,11 +17,13 @@ class Player(Entity):
     def __init__(
         self,
         assets: dict[str, Any],
-        particles: list[Particle],
+        particles: ParticleSystem,
         position: Vec2,
         size: Vec2,
+        rng: random.Random | None = None,
     ) -> None:
         super().__init__(assets, "player", position, size)
+        self._rng = rng if rng is not None else random.Random()
         self._particles = particles
         self._air_time = 0
         self._jumps = 1
@@ -28,6 +33,8 @@ class Player(Entity):
 
     def set_position(self, position: Vec2) -> None:
         self._position = position
+        self._previous_position = position.copy()
+        self._update_rect()
         self._dead = False
         self._air_time = 0
 
@@ -65,7 +72,7 @@ class Player(Entity):
 
         if self._dashing == 60 or self._dashing == 50:
             for _ in range(20):
-                self._particles.append(self._get_dash_particle())
+                self._spawn_dash_particle()
 
         if self._dashing > 0:
             self._dashing -= 1
@@ -75,33 +82,37 @@ class Player(Entity):
             if self._dashing == 51:
                 self._velocity.x *= 0.1
 
-            self._particles.append(self._get_trace_particle())
+            self._spawn_trace_particle()
 
-    def render(self, display: Surface, offset: Vec2 = Vec2(0, 0)) -> None:
+    def render(
+        self,
+        display: Surface,
+        offset: Vec2 = Vec2(0, 0),
+        outline: OutlineRenderer | None = None,
+        alpha: float = 1.0,
+    ) -> None:
         if self._dashing <= 50:
-            return super().render(display, offset)
+            return super().render(display, offset, outline, alpha)
 
-    def _get_dash_particle(self) -> Particle:
-        angle = random.random() * math.pi * 2
-        speed = random.random() * 0.5 + 0.5
+    def _spawn_dash_particle(self) -> None:
+        angle = self._rng.random() * math.pi * 2
+        speed = self._rng.random() * 0.5 + 0.5
 
-        return Particle(
-            self._assets,
+        self._particles.spawn(
             "particle",
             position=Vec2(self.rect.center),
             velocity=Vec2(math.cos(angle) * speed, math.sin(angle) * speed),
-            frame=random.randint(0, 3),
+            frame=self._rng.randint(0, 3),
         )
 
-    def _get_trace_particle(self) -> Particle:
-        speed = random.random() * 3
+    def _spawn_trace_particle(self) -> None:
+        speed = self._rng.random() * 3
 
-        return Particle(
-            self._assets,
+        self._particles.spawn(
             "particle",
             position=Vec2(self.rect.center),
             velocity=Vec2(speed * (-1 if self._flip else 1), 0),
-            frame=random.randint(0, 3),
+            frame=self._rng.randint(0, 3),
         )
 
     def jump(self) -> None:
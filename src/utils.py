@@ -1,19 +1,35 @@
+import functools
 import os
 
 import pygame
 
+from src.Atlas import Atlas
+
 IMAGES_DIR = "assets/images/"
 
 
+@functools.cache
+def _atlas() -> Atlas | None:
+    return Atlas.load(IMAGES_DIR)
+
+
 def load_image(path: str) -> pygame.Surface:
     """Load image from assets/image/ directory
 
+    Images come from the atlas built by build_atlas.py when it is up to
+    date, as subsurfaces shared by every caller, so they must not be drawn
+    on. Otherwise the PNG is loaded.
+
     Args:
         path (str): relative path to image in assets/image/
 
     Returns:
         pygame.Surface: loaded image
     """
+    atlas = _atlas()
+    if atlas is not None and path in atlas:
+        return atlas.image(path)
+
     img = pygame.image.load(IMAGES_DIR + path).convert()
     img.set_colorkey((0, 0, 0))
     return img
@@ -28,9 +44,37 @@ def load_images(path: str) -> list[pygame.Surface]:
     Returns:
         list[pygame.Surface]: list of loaded images
     """
+    atlas = _atlas()
+    if atlas is not None and atlas.has_dir(path):
+        return atlas.images(path)
+
     imgs = []
 
     for image_path in sorted(os.listdir(IMAGES_DIR + path)):
         imgs.append(load_image(path + "/" + image_path))
 
     return imgs
+
+
+def flip_image(img: pygame.Surface) -> pygame.Surface:
+    """Create horizontally flipped copy of image
+
+    Args:
+        img (pygame.Surface): image to flip
+
+    Returns:
+        pygame.Surface: flipped image
+    """
+    return pygame.transform.flip(img, True, False)
+
+
+def flip_images(imgs: list[pygame.Surface]) -> list[pygame.Surface]:
+    """Create horizontally flipped copies of images
+
+    Args:
+        imgs (list[pygame.Surface]): images to flip
+
+    Returns:
+        list[pygame.Surface]: flipped images, in the same order
+    """
+    return [flip_image(img) for img in imgs]